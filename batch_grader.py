@@ -0,0 +1,296 @@
+# Offline answer-sheet grader for the Exam Simulator
+# ----------------------------------------------------------------------
+# Scores answer sheets against a question bank (.docx or .txt, parsed with the
+# same parsers as the app) using the Exam Mode rule: an answer is correct only
+# when its sorted option letters equal the bank's correct letters. Sheets are
+# read, scored in parallel worker processes and written out one result at a
+# time, so memory stays flat however many sheets come in.
+#
+# ANSWER SHEETS (one sheet per row / line / list item):
+#   .csv    sheet_id,[variant,]<question>,<question>,...
+#   .jsonl  {"sheet_id": "s1", ["variant": 3,] "answers": {"<question>": "A,C", ...}}
+#   .json   a list of the same objects (read incrementally)
+# <question> is a bank question ID ("24", "Q24"). Sheets with a variant number
+# were taken on a paper from export_papers.py: their questions are paper
+# positions (1, 2, ...) and are graded against that variant's answer key, so
+# pass the same --seed and --questions the papers were exported with.
+# Answers are option letters ("B", "A,C", "AC" or a JSON list); blank = unanswered.
+#
+# OUTPUT: one row per sheet (JSONL or CSV) with the score, the wrong question IDs
+# and the unanswered question IDs. Every question of the answer key counts towards
+# the total, so questions a sheet leaves out are reported as unanswered. A sheet
+# that cannot be graded (bad variant, not a JSON object, ...) gets a row with an
+# "error" field instead and grading carries on.
+#
+# USAGE:
+#    python batch_grader.py "banks/LEX AWS Certified Cloud Practitioner.txt" sheets.csv --out scores.jsonl
+#    python batch_grader.py bank.docx sheets.jsonl --seed 42 --questions 65 --format csv > scores.csv
+# ----------------------------------------------------------------------
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from exam_core import get_user_answer_chars, is_answer_correct
+from export_papers import build_variant, load_bank
+
+# "24", "Q24", "Question 24", "#24" all refer to question 24
+QUESTION_REF_PATTERN = re.compile(r'^\s*(?:question|q)?\s*#?\s*(\d+)\s*$', re.IGNORECASE)
+# Bare letter answers: "B", "A,C", "A; C", "AC"
+LETTER_ANSWER_PATTERN = re.compile(r'^[A-Fa-f](?:\s*[,;/|]?\s*[A-Fa-f])*$')
+SHEET_FIELDS = ["sheet_id", "variant"]
+OUTPUT_FIELDS = ["sheet_id", "variant", "total", "answered", "correct", "score_pct", "wrong", "unanswered", "unknown_questions", "error"]
+VARIANT_CACHE_SIZE = 256 # Answer keys of recently seen variants kept per worker
+
+# Set once per worker process by init_worker() so the bank is pickled once per worker, not once per batch
+_worker_state = None
+
+# --- 1. SCORING (runs in worker processes) ---
+
+def parse_answer_letters(raw_answer):
+    """Returns the sorted, de-duplicated option letters of one sheet answer. Empty list = unanswered."""
+    if raw_answer is None:
+        return []
+    if isinstance(raw_answer, list):
+        return sorted(set(get_user_answer_chars([str(x) for x in raw_answer if str(x).strip()])))
+    text = str(raw_answer).strip()
+    if not text:
+        return []
+    if LETTER_ANSWER_PATTERN.match(text):
+        return sorted(set(re.findall(r'[A-Fa-f]', text.upper())))
+    return get_user_answer_chars(text) # Prefixed option text, e.g. "C: Amazon S3"
+
+def init_worker(questions, job):
+    global _worker_state
+    _worker_state = {
+        "questions": questions,
+        "job": job,
+        "bank_key": {str(q["id"]): (q["id"], q["correct"]) for q in questions},
+        "variant_keys": {},
+    }
+
+def get_variant_key(variant_no):
+    """Answer key of one exported paper variant: paper position -> (bank question ID, correct letters)."""
+    cache = _worker_state["variant_keys"]
+    if variant_no not in cache:
+        if len(cache) >= VARIANT_CACHE_SIZE:
+            cache.pop(next(iter(cache)))
+        job = _worker_state["job"]
+        variant = build_variant(_worker_state["questions"], variant_no, job["seed"], job["questions"])
+        cache[variant_no] = {str(n): (q["source_id"], q["correct"]) for n, q in enumerate(variant, 1)}
+    return cache[variant_no]
+
+def grade_sheet(sheet):
+    variant_no = sheet["variant"]
+    answer_key = get_variant_key(int(variant_no)) if variant_no not in (None, "") else _worker_state["bank_key"]
+
+    answered, unknown = {}, []
+    for question_ref, raw_answer in sheet["answers"].items():
+        match = QUESTION_REF_PATTERN.match(str(question_ref))
+        key_ref = str(int(match.group(1))) if match else None
+        if key_ref not in answer_key:
+            unknown.append(str(question_ref))
+            continue
+        letters = parse_answer_letters(raw_answer)
+        if letters:
+            answered[key_ref] = letters # "24" and "Q24" on one sheet: the last answer wins
+
+    correct = 0
+    wrong, unanswered = [], []
+    for key_ref, (q_id, correct_letters) in answer_key.items():
+        if key_ref not in answered:
+            unanswered.append(q_id) # Left blank or missing from the sheet
+        elif is_answer_correct(answered[key_ref], correct_letters):
+            correct += 1
+        else:
+            wrong.append(q_id)
+
+    total = len(answer_key)
+    return {
+        "sheet_id": sheet["sheet_id"],
+        "variant": variant_no,
+        "total": total,
+        "answered": correct + len(wrong),
+        "correct": correct,
+        "score_pct": round(correct / total * 100, 1) if total else 0.0,
+        "wrong": sorted(wrong),
+        "unanswered": sorted(unanswered),
+        "unknown_questions": unknown,
+    }
+
+def grade_sheet_safely(sheet):
+    """Grades one sheet; a sheet that cannot be graded becomes an error row instead of failing the whole batch."""
+    if sheet.get("error"):
+        return {"sheet_id": sheet["sheet_id"], "variant": sheet["variant"], "error": sheet["error"]}
+    try:
+        return grade_sheet(sheet)
+    except Exception as e:
+        return {"sheet_id": sheet["sheet_id"], "variant": sheet["variant"], "error": f"{type(e).__name__}: {e}"}
+
+def grade_batch(sheets):
+    return [grade_sheet_safely(sheet) for sheet in sheets]
+
+# --- 2. STREAMING READERS ---
+# Each reader yields {"sheet_id", "variant", "answers"} dicts one at a time.
+# Records that cannot be read as a sheet carry an "error" and are reported, not graded.
+
+def error_sheet(row_no, message):
+    return {"sheet_id": row_no, "variant": None, "answers": {}, "error": message}
+
+def make_sheet(record, row_no):
+    if not isinstance(record, dict):
+        return error_sheet(row_no, f"expected a JSON object, got {type(record).__name__}")
+    answers = record.get("answers", {})
+    if isinstance(answers, list): # Answers listed in question order
+        answers = {str(n): answer for n, answer in enumerate(answers, 1)}
+    elif not isinstance(answers, dict):
+        return error_sheet(record.get("sheet_id", row_no), f"\"answers\" must be an object or a list, got {type(answers).__name__}")
+    return {"sheet_id": record.get("sheet_id", row_no), "variant": record.get("variant"), "answers": answers}
+
+def read_csv_sheets(f):
+    reader = csv.DictReader(f)
+    id_field = "sheet_id" if "sheet_id" in (reader.fieldnames or []) else (reader.fieldnames or [None])[0]
+    for row_no, row in enumerate(reader, 1):
+        answers = {name: value for name, value in row.items() if name not in SHEET_FIELDS and name != id_field and name is not None}
+        yield {"sheet_id": row.get(id_field) or row_no, "variant": row.get("variant"), "answers": answers}
+
+def read_jsonl_sheets(f):
+    for row_no, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield error_sheet(row_no, f"invalid JSON: {e}")
+            continue
+        yield make_sheet(record, row_no)
+
+def read_json_sheets(f, chunk_size=1 << 16):
+    """Reads a JSON list of sheets item by item instead of loading the whole document."""
+    decoder = json.JSONDecoder()
+    buffer, pos, row_no, started = "", 0, 0, False
+    for chunk in iter(lambda: f.read(chunk_size), ""):
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        while True:
+            while pos < len(buffer) and (buffer[pos].isspace() or (started and buffer[pos] == ",")):
+                pos += 1
+            if pos == len(buffer):
+                break
+            if not started:
+                if buffer[pos] != "[":
+                    raise SystemExit("A .json answer-sheet file must contain a list of sheets.")
+                started, pos = True, pos + 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                record, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break # Item continues in the next chunk
+            row_no += 1
+            yield make_sheet(record, row_no)
+    if buffer[pos:].strip():
+        raise SystemExit("The answer-sheet JSON list ended unexpectedly.")
+
+SHEET_READERS = {"csv": read_csv_sheets, "jsonl": read_jsonl_sheets, "json": read_json_sheets}
+
+# --- 3. STREAMING WRITERS ---
+
+def write_jsonl(results, out):
+    for result in results:
+        out.write(json.dumps(result) + "\n")
+        yield result
+
+def write_csv(results, out):
+    writer = csv.DictWriter(out, fieldnames=OUTPUT_FIELDS)
+    writer.writeheader()
+    for result in results:
+        row = dict(result)
+        for field in ("wrong", "unanswered", "unknown_questions"):
+            row[field] = ";".join(map(str, row.get(field, [])))
+        writer.writerow(row)
+        yield result
+
+SCORE_WRITERS = {"jsonl": write_jsonl, "csv": write_csv}
+
+# --- 4. PIPELINE ---
+
+def grade_stream(sheets, pool, batch_size, max_in_flight):
+    """
+    Sends sheets to the pool in batches and yields results in input order.
+    At most `max_in_flight` batches are queued at once, which keeps memory flat on any input size.
+    """
+    in_flight = deque()
+    sheets = iter(sheets)
+    while True:
+        batch = list(itertools.islice(sheets, batch_size))
+        if not batch:
+            break
+        in_flight.append(pool.submit(grade_batch, batch))
+        if len(in_flight) >= max_in_flight:
+            yield from in_flight.popleft().result()
+    while in_flight:
+        yield from in_flight.popleft().result()
+
+def detect_format(path, choices, default):
+    extension = path.rsplit(".", 1)[-1].lower() if path and "." in os.path.basename(path) else ""
+    return extension if extension in choices else default
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grade offline answer sheets (CSV/JSON/JSONL) against a question bank.")
+    parser.add_argument("bank", help="Question bank file (.docx or .txt).")
+    parser.add_argument("sheets", help="Answer-sheet file (.csv, .json or .jsonl), or - for stdin.")
+    parser.add_argument("--sheet-format", choices=sorted(SHEET_READERS), help="Answer-sheet format (default: from the file extension).")
+    parser.add_argument("--out", help="Output file (default: stdout).")
+    parser.add_argument("--format", choices=sorted(SCORE_WRITERS), help="Output format (default: from --out extension, else jsonl).")
+    parser.add_argument("--seed", default="0", help="Seed the papers were exported with, for sheets with a variant (default: 0).")
+    parser.add_argument("--questions", type=int, default=65, help="Questions per exported paper, for sheets with a variant (default: 65).")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: one per CPU core).")
+    parser.add_argument("--batch-size", type=int, default=200, help="Sheets sent to a worker at a time (default: 200).")
+    args = parser.parse_args(argv)
+
+    sheet_format = args.sheet_format or detect_format(args.sheets, SHEET_READERS, None)
+    if sheet_format is None:
+        parser.error("cannot tell the answer-sheet format from the file name; pass --sheet-format")
+    out_format = args.format or detect_format(args.out, SCORE_WRITERS, "jsonl")
+
+    questions = load_bank(args.bank)
+    job = {"seed": args.seed, "questions": args.questions}
+    workers = args.workers or os.cpu_count() or 1
+
+    sheets_in = sys.stdin if args.sheets == "-" else open(args.sheets, newline="", encoding="utf-8-sig")
+    scores_out = open(args.out, "w", newline="", encoding="utf-8") if args.out else sys.stdout
+    graded = failed = total_score = 0
+    started = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(questions, job)) as pool:
+            results = grade_stream(SHEET_READERS[sheet_format](sheets_in), pool, args.batch_size, workers * 2)
+            for result in SCORE_WRITERS[out_format](results, scores_out):
+                if "error" in result:
+                    failed += 1
+                    continue
+                graded += 1
+                total_score += result["score_pct"]
+    finally:
+        if sheets_in is not sys.stdin:
+            sheets_in.close()
+        if scores_out is not sys.stdout:
+            scores_out.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"Graded {graded} sheets (mean score {total_score / graded if graded else 0:.1f}%) in {elapsed:.1f}s "
+          f"using {workers} worker process(es).", file=sys.stderr)
+    if failed:
+        print(f"{failed} sheet(s) could not be graded; see the \"error\" field in the output.", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
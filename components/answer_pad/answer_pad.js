@@ -0,0 +1,127 @@
+// Keyboard answer pad for Exam Mode.
+// Speaks the Streamlit component protocol directly (no build step). The selection lives here in the
+// browser; the server only hears about it once, when the user submits (Enter) or moves on (N).
+
+(function () {
+    var args = null;          // Latest render args from Python
+    var questionId = null;    // Question currently shown
+    var selected = [];        // Letters picked for the current question
+    var shownAt = 0;          // performance.now() when the current question appeared
+
+    function send(type, data) {
+        var message = Object.assign({ isStreamlitMessage: true, type: type }, data);
+        window.parent.postMessage(message, "*");
+    }
+
+    function setValue(action) {
+        send("streamlit:setComponentValue", {
+            dataType: "json",
+            value: {
+                msg_id: Date.now() + "-" + Math.random().toString(36).slice(2),
+                action: action,
+                question_id: questionId,
+                selection: selected.slice().sort(),
+                elapsed: (performance.now() - shownAt) / 1000
+            }
+        });
+    }
+
+    function toggle(letter) {
+        if (!args || args.answered) return;
+        var known = args.options.some(function (opt) { return opt.letter === letter; });
+        if (!known) return;
+        if (args.multi) {
+            var at = selected.indexOf(letter);
+            if (at >= 0) selected.splice(at, 1); else selected.push(letter);
+        } else {
+            selected = [letter];
+        }
+        render();
+    }
+
+    function submit() {
+        if (args && !args.answered && selected.length > 0) setValue("submit");
+    }
+
+    function next() {
+        if (args && args.can_proceed) setValue(args.is_last ? "finish" : "next");
+    }
+
+    function render() {
+        var optionsEl = document.getElementById("options");
+        optionsEl.innerHTML = "";
+        args.options.forEach(function (opt) {
+            var row = document.createElement("div");
+            var classes = ["option"];
+            var isPicked = args.answered ? args.picked.indexOf(opt.letter) >= 0 : selected.indexOf(opt.letter) >= 0;
+            if (args.answered) {
+                classes.push("locked");
+                if (args.correct.indexOf(opt.letter) >= 0) classes.push("correct");
+                else if (isPicked) classes.push("wrong");
+            } else if (isPicked) {
+                classes.push("selected");
+            }
+            row.className = classes.join(" ");
+
+            var badge = document.createElement("span");
+            badge.className = "letter";
+            badge.textContent = opt.letter;
+            var text = document.createElement("span");
+            text.textContent = opt.text;
+            row.appendChild(badge);
+            row.appendChild(text);
+            row.addEventListener("click", function () { toggle(opt.letter); });
+            optionsEl.appendChild(row);
+        });
+
+        var hint = args.multi ? "ℹ️ Select all that apply" : "Select one option";
+        if (args.timed_out) hint = "⏰ Time Out";
+        else if (args.answered) hint = "⏹ Answer locked in";
+        document.getElementById("hint").textContent = hint + "  ·  keys: A–" + args.options[args.options.length - 1].letter + ", Enter, N";
+
+        var submitBtn = document.getElementById("submit");
+        submitBtn.disabled = args.answered || selected.length === 0;
+        var nextBtn = document.getElementById("next");
+        nextBtn.disabled = !args.can_proceed;
+        nextBtn.innerHTML = (args.is_last ? "Finish Quiz" : "Next Question ➡") + " <kbd>N</kbd>";
+
+        send("streamlit:setFrameHeight", { height: document.body.scrollHeight + 4 });
+    }
+
+    function onKeyDown(event) {
+        var target = event.target;
+        if (event.ctrlKey || event.metaKey || event.altKey) return;
+        if (target && (target.tagName === "INPUT" || target.tagName === "TEXTAREA" || target.isContentEditable)) return;
+        var key = event.key.toUpperCase();
+        if (key === "ENTER") { submit(); event.preventDefault(); }
+        else if (key === "N") { next(); event.preventDefault(); }
+        else if (key.length === 1 && key >= "A" && key <= "F") { toggle(key); event.preventDefault(); }
+    }
+
+    window.addEventListener("message", function (event) {
+        if (!event.data || event.data.type !== "streamlit:render") return;
+        args = event.data.args;
+        if (args.question_id !== questionId) {
+            questionId = args.question_id;
+            selected = [];
+            shownAt = performance.now();
+        }
+        render();
+    });
+
+    document.getElementById("submit").addEventListener("click", submit);
+    document.getElementById("next").addEventListener("click", next);
+
+    // Shortcuts work whether focus is inside this frame or on the app page (same origin)
+    document.addEventListener("keydown", onKeyDown);
+    try {
+        window.parent.document.addEventListener("keydown", onKeyDown);
+        window.addEventListener("unload", function () {
+            window.parent.document.removeEventListener("keydown", onKeyDown);
+        });
+    } catch (e) {
+        // Cross-origin parent: shortcuts only work while the pad has focus
+    }
+
+    send("streamlit:componentReady", { apiVersion: 1 });
+})();
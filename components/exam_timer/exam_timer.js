@@ -0,0 +1,77 @@
+// Exam clocks that tick in the browser.
+// Speaks the Streamlit component protocol directly (no build step). The frame and its assets load once;
+// each rerun only sends the current seconds, which re-syncs the running clock.
+//   kind "clock":     header clock; counts up from `seconds`, or down to 0 when `limit` (seconds) is set
+//   kind "countdown": per-question timer; counts down from `seconds`, turning amber, red and blinking
+// When a running countdown (or a clock with a limit) reaches zero, the component sends a value. That reruns the
+// session, so the app records the timeout even if the server could not push a rerun to this tab itself.
+
+(function () {
+    var timerEl = document.getElementById("timer");
+    var interval = null;
+    var zeroPending = false; // Set while the current countdown has time left and has not reported zero yet
+
+    function send(type, data) {
+        var message = Object.assign({ isStreamlitMessage: true, type: type }, data);
+        window.parent.postMessage(message, "*");
+    }
+
+    function hms(total) {
+        var h = Math.floor(total / 3600);
+        var m = Math.floor((total % 3600) / 60);
+        var s = total % 60;
+        return (h < 10 ? "0" : "") + h + ":" + (m < 10 ? "0" : "") + m + ":" + (s < 10 ? "0" : "") + s;
+    }
+
+    function reportZero() {
+        if (!zeroPending) return;
+        zeroPending = false;
+        send("streamlit:setComponentValue", { dataType: "json", value: { reached_zero_at: Date.now() } });
+    }
+
+    function showClock(args, passed) {
+        var diff = args.seconds + passed;
+        if (args.limit > 0) {
+            diff = Math.max(0, args.limit - diff);
+            if (diff === 0) reportZero();
+        }
+        timerEl.textContent = "⏱️ " + hms(diff);
+    }
+
+    function showCountdown(args, passed) {
+        var timeleft = args.seconds - passed;
+        if (timeleft <= 0) {
+            clearInterval(interval);
+            timerEl.textContent = "🔴 Time Up!";
+            timerEl.style.color = "red";
+            reportZero();
+            return;
+        }
+        timerEl.textContent = "⏳ " + hms(timeleft) + " Left";
+        if (timeleft > 60) timerEl.style.color = "#10b981";
+        else if (timeleft > 30) timerEl.style.color = "#f59e0b";
+        else timerEl.style.color = "#ef4444";
+        timerEl.classList.toggle("blink_me", timeleft <= 20);
+    }
+
+    function start(args) {
+        clearInterval(interval);
+        document.body.className = args.kind;
+        timerEl.classList.remove("blink_me");
+        // Only a timer that still had time left reports zero, so a rerun at zero cannot trigger another one
+        zeroPending = args.kind === "countdown" ? args.seconds > 0 : args.limit > 0 && args.seconds < args.limit;
+        var startedAt = Date.now();
+        var show = args.kind === "countdown" ? showCountdown : showClock;
+        function tick() { show(args, Math.floor((Date.now() - startedAt) / 1000)); }
+        tick();
+        interval = setInterval(tick, 1000);
+        send("streamlit:setFrameHeight", { height: document.body.scrollHeight + 4 });
+    }
+
+    window.addEventListener("message", function (event) {
+        if (!event.data || event.data.type !== "streamlit:render") return;
+        start(event.data.args);
+    });
+
+    send("streamlit:componentReady", { apiVersion: 1 });
+})();
@@ -0,0 +1,242 @@
+# Shared question-bank logic for the Exam Simulator
+# ----------------------------------------------------------------------
+# Parsing of .docx / .txt question banks (and their images) and the answer
+# scoring rule, without any Streamlit dependency, so quiz_app1.py and the
+# command-line tools (export_papers.py, batch_grader.py) can all import it,
+# including from worker processes.
+# ----------------------------------------------------------------------
+
+from docx import Document
+import re
+import os
+import io
+import hashlib
+import uuid
+from PIL import Image
+
+# --- CONSTANTS FOR EXTENDED OPTIONS ---
+VALID_OPTIONS = ["A", "B", "C", "D", "E", "F"]
+VALID_OPTION_CHARS_PATTERN = r'[a-fA-F]'
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# --- DOCX IMAGE ASSETS ---
+# Images are stored once per content hash under ./static (served by Streamlit's static file serving,
+# see .streamlit/config.toml) and referenced by URL, never inlined into the page.
+ASSET_DIR = os.path.join(APP_DIR, "static", "question_assets")
+THUMBNAIL_MAX_SIZE = (640, 400)
+
+# --- PARSING LOGIC & HELPERS ---
+
+def is_valid_option_format(text):
+    """Checks if a string starts with A-F followed by a separator and contains content."""
+    if len(text) < 2 or text[0].upper() not in VALID_OPTIONS:
+        return False
+    
+    # Check for standard separators: A: or A. or A)
+    is_valid_separator = text[1] in [":", ".", ")"]
+    # Check for parenthesis format: (A)
+    is_valid_parenthesis = text.startswith("(") and len(text) >= 3 and text[2] == ')' and text[1].upper() in VALID_OPTIONS
+    
+    content_after_prefix = ""
+    if is_valid_separator:
+        # Check content after 'A.', 'B:', etc.
+        content_after_prefix = re.sub(r'^[a-zA-Z][.:\)]\s*', '', text).strip()
+    elif is_valid_parenthesis:
+        # Check content after '(A)', '(B)', etc.
+        content_after_prefix = re.sub(r'^\([a-zA-Z]\)\s*', '', text).strip()
+
+    return bool(content_after_prefix)
+
+def get_raw_option_text(option_text):
+    """Strips any leading option prefix (A:, B., (C)) from the text."""
+    # Pattern to match and remove prefixes: (optional parenthesis) Letter (:, ., or )) (optional parenthesis)
+    return re.sub(r'^\s*[\(]?[a-zA-Z][\.:\)]?\s*', '', option_text).strip()
+
+def add_option_prefixes(raw_option_texts):
+    """Generates the A:, B:, C: prefixes automatically for a list of raw option texts."""
+    prefixed_options = []
+    for i, text in enumerate(raw_option_texts):
+        if i < len(VALID_OPTIONS):
+            prefix = VALID_OPTIONS[i]
+            prefixed_options.append(f"{prefix}: {text}")
+        else:
+            prefixed_options.append(text)
+    return prefixed_options
+
+
+def store_image_asset(blob, extension):
+    """
+    Saves an image into the shared asset store, named by its content hash (so identical images are stored once),
+    and generates its downscaled thumbnail once. Returns {"full": file_name, "thumb": file_name}.
+    """
+    digest = hashlib.sha256(blob).hexdigest()[:24]
+    extension = extension.lower().lstrip(".")
+    full_name = f"{digest}.{extension}"
+    thumb_name = f"{digest}_thumb.{extension}"
+    os.makedirs(ASSET_DIR, exist_ok=True)
+
+    full_path = os.path.join(ASSET_DIR, full_name)
+    if not os.path.exists(full_path):
+        temp_path = f"{full_path}.{uuid.uuid4().hex}.tmp" # Write then rename so concurrent parses never serve half a file
+        with open(temp_path, "wb") as f:
+            f.write(blob)
+        os.replace(temp_path, full_path)
+
+    thumb_path = os.path.join(ASSET_DIR, thumb_name)
+    if not os.path.exists(thumb_path):
+        temp_path = f"{thumb_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with Image.open(io.BytesIO(blob)) as img:
+                img_format = img.format
+                img.thumbnail(THUMBNAIL_MAX_SIZE)
+                img.save(temp_path, format=img_format)
+            os.replace(temp_path, thumb_path)
+        except Exception:
+            if os.path.exists(temp_path): # A failed save can leave a partial file behind
+                os.remove(temp_path)
+            thumb_name = full_name # Formats Pillow cannot resize (e.g. EMF) are shown as-is
+
+    return {"full": full_name, "thumb": thumb_name}
+
+def extract_paragraph_images(doc, para):
+    """Stores every inline image of a DOCX paragraph in the asset store and returns their asset records."""
+    images = []
+    for rel_id in para._element.xpath('.//a:blip/@r:embed'):
+        image_part = doc.part.related_parts.get(rel_id)
+        if image_part is not None and hasattr(image_part, "blob"):
+            images.append(store_image_asset(image_part.blob, image_part.partname.ext))
+    return images
+
+def iter_docx_questions(uploaded_file, progress=None):
+    """
+    Yields questions from a DOCX file one at a time as they are parsed, storing RAW option text and extracted images.
+    progress(done, total) is called with the paragraph position after each question.
+    """
+    doc = Document(uploaded_file)
+    paragraphs = doc.paragraphs
+    current_question_lines = []
+    raw_options = [] # Store raw option text without generated prefix
+    current_images = [] # Asset records of diagrams in the current question
+    q_id = 1
+    
+    for position, para in enumerate(paragraphs, 1):
+        current_images.extend(extract_paragraph_images(doc, para))
+        text = para.text.strip()
+        if not text: continue
+        
+        text_lower = text.lower()
+        
+        # 1. Answer Line Detection: Finalize the current question
+        if text_lower.startswith("correct answer") or text_lower.startswith("answer"):
+            if current_question_lines and len(raw_options) >= 2:
+                clean_line = text_lower.replace("correct answer", "").replace("answer", "").replace(":", "").strip()
+                found_answers = re.findall(VALID_OPTION_CHARS_PATTERN, clean_line)
+                correct_list = sorted(list(set([x.upper() for x in found_answers])))
+                
+                yield {
+                    "id": q_id,
+                    "question": "\n".join(current_question_lines).strip(),
+                    "options": raw_options, # Store RAW options
+                    "correct": correct_list,
+                    "images": current_images
+                }
+                q_id += 1
+                if progress: progress(position, len(paragraphs))
+            # Reset for the next question
+            current_question_lines = []
+            raw_options = []
+            current_images = []
+            
+        # 2. Option Detection: Starts an option sequence
+        elif is_valid_option_format(text):
+            # Extract raw text and store it
+            raw_text = get_raw_option_text(text)
+            raw_options.append(raw_text)
+                
+        # 3. Question Text: If we haven't started options, this must be question text.
+        elif len(raw_options) == 0:
+            current_question_lines.append(text)
+
+def iter_txt_questions(uploaded_file, progress=None):
+    """
+    Yields questions from a TXT file one at a time as they are parsed, storing RAW option text.
+    progress(done, total) is called with the line position after each question.
+    """
+    content = uploaded_file.getvalue().decode("utf-8")
+    lines = content.splitlines()
+    current_question_lines = []
+    raw_options = [] # Store raw option text without generated prefix
+    q_id = 1
+    
+    for position, line in enumerate(lines, 1):
+        text = line.strip()
+        if not text: continue
+        
+        text_lower = line.strip().lower()
+        
+        # 1. Answer Line Detection: Finalize the current question
+        if text_lower.startswith("correct answer") or text_lower.startswith("answer"):
+            if current_question_lines and len(raw_options) >= 2:
+                clean_line = text_lower.replace("correct answer", "").replace("answer", "").replace(":", "").strip()
+                found_answers = re.findall(VALID_OPTION_CHARS_PATTERN, clean_line)
+                correct_list = sorted(list(set([x.upper() for x in found_answers])))
+                
+                yield {
+                    "id": q_id,
+                    "question": "\n".join(current_question_lines).strip(),
+                    "options": raw_options, # Store RAW options
+                    "correct": correct_list
+                }
+                q_id += 1
+                if progress: progress(position, len(lines))
+            # Reset for the next question
+            current_question_lines = []
+            raw_options = []
+            
+        # 2. Option Detection: Starts an option sequence
+        elif is_valid_option_format(text):
+            # Extract raw text and store it
+            raw_text = get_raw_option_text(text)
+            raw_options.append(raw_text)
+                
+        # 3. Question Text: If we haven't started options, this must be question text.
+        elif len(raw_options) == 0:
+            current_question_lines.append(text)
+
+def parse_docx(uploaded_file):
+    """Parses all questions and options from a DOCX file."""
+    return list(iter_docx_questions(uploaded_file))
+
+def parse_txt(uploaded_file):
+    """Parses all questions and options from a TXT file."""
+    return list(iter_txt_questions(uploaded_file))
+
+def iter_question_file(file_obj, file_name, progress=None):
+    """Question generator for the DOCX or TXT parser based on the file extension. Returns None for unsupported types."""
+    file_extension = file_name.split('.')[-1].lower()
+    if file_extension == 'docx':
+        return iter_docx_questions(file_obj, progress)
+    elif file_extension == 'txt':
+        return iter_txt_questions(file_obj, progress)
+    return None
+
+def parse_question_file(file_obj, file_name):
+    """Dispatches to the DOCX or TXT parser based on the file extension. Returns None for unsupported types."""
+    questions = iter_question_file(file_obj, file_name)
+    return list(questions) if questions is not None else None
+
+# --- SCORING (shared by Exam Mode, the results screen and batch_grader.py) ---
+
+def get_user_answer_chars(user_choice):
+    """Returns the sorted option letters of a saved answer ('A: text' or a list of them)."""
+    if isinstance(user_choice, list): # Multiple choice
+        # Get the first character of the prefixed string (A: Option)
+        return sorted([x.strip()[0].upper() for x in user_choice])
+    elif user_choice and isinstance(user_choice, str): # Single choice
+        return [user_choice.strip()[0].upper()]
+    return []
+
+def is_answer_correct(user_chars, correct_chars):
+    """An answer is correct only when its sorted option letters equal the correct letters (all of them, nothing extra)."""
+    return sorted(user_chars) == sorted(correct_chars)
@@ -0,0 +1,159 @@
+# Printable exam-paper export for the Exam Simulator
+# ----------------------------------------------------------------------
+# Builds K seeded exam variants from one question bank (.docx or .txt, parsed
+# with the same parsers as the app). Every variant draws its own question
+# order and shuffles the options of each question, and is written as a .docx
+# exam paper plus a matching .docx answer key. Variants are generated in
+# parallel worker processes; the same --seed always produces the same papers.
+#
+# USAGE:
+#    python export_papers.py "banks/LEX AWS Certified Cloud Practitioner.txt" --variants 200 --questions 65 --seed 42
+#    python export_papers.py bank.docx --variants 20 --out papers/ --workers 4
+# ----------------------------------------------------------------------
+
+import argparse
+import io
+import os
+import random
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from docx import Document
+from docx.image.exceptions import UnrecognizedImageError
+from docx.shared import Inches
+
+from exam_core import VALID_OPTIONS, ASSET_DIR, parse_question_file
+
+# Bank files often start each question with its own label ("Question 49:"); papers number questions themselves
+QUESTION_LABEL_PATTERN = re.compile(r'^\s*(question|q)\s*\d+\s*[:.)]?\s*', re.IGNORECASE)
+
+# Set once per worker process by init_worker() so the bank is pickled once per worker, not once per variant
+_worker_job = None
+
+# --- 1. VARIANT GENERATION ---
+
+def build_variant(questions, variant_no, seed, n_questions):
+    """
+    Returns one variant in paper order. Each entry keeps its source question ID, the shuffled options
+    and the correct letters remapped to the new option order.
+    """
+    rng = random.Random(f"{seed}:{variant_no}")
+    drawn = rng.sample(questions, min(n_questions, len(questions)))
+    variant = []
+    for q in drawn:
+        options = q["options"][:len(VALID_OPTIONS)]
+        order = rng.sample(range(len(options)), len(options))
+        correct = [VALID_OPTIONS[pos] for pos, original in enumerate(order) if VALID_OPTIONS[original] in q["correct"]]
+        variant.append({
+            "source_id": q["id"],
+            "question": QUESTION_LABEL_PATTERN.sub("", q["question"], count=1),
+            "options": [options[i] for i in order],
+            "correct": correct,
+            "images": q.get("images", []),
+        })
+    return variant
+
+# --- 2. DOCX WRITERS ---
+
+def write_exam_paper(variant, path, title, variant_no):
+    doc = Document()
+    doc.add_heading(title, level=1)
+    doc.add_paragraph(f"Variant {variant_no:03d}  ·  {len(variant)} questions")
+    doc.add_paragraph("Name: ______________________________     Date: ______________")
+
+    for n, q in enumerate(variant, 1):
+        para = doc.add_paragraph()
+        para.add_run(f"{n}. {q['question']}").bold = True
+        if len(q["correct"]) > 1:
+            para.add_run("  (Select all that apply)").italic = True
+        for img in q["images"]:
+            image_path = os.path.join(ASSET_DIR, img["full"])
+            if os.path.exists(image_path):
+                run = doc.add_paragraph().add_run()
+                try:
+                    run.add_picture(image_path, width=Inches(4))
+                except UnrecognizedImageError: # Formats python-docx cannot embed (e.g. EMF) get a placeholder
+                    run.text = f"[diagram: {img['full']}]"
+        for letter, text in zip(VALID_OPTIONS, q["options"]):
+            doc.add_paragraph(f"{letter}. {text}").paragraph_format.left_indent = Inches(0.3)
+
+    doc.save(path)
+
+def write_answer_key(variant, path, title, variant_no):
+    doc = Document()
+    doc.add_heading(f"{title} — Answer Key", level=1)
+    doc.add_paragraph(f"Variant {variant_no:03d}  ·  {len(variant)} questions")
+
+    table = doc.add_table(rows=1, cols=3)
+    table.style = "Table Grid"
+    header = table.rows[0].cells
+    header[0].text, header[1].text, header[2].text = "Question", "Answer", "Bank Question ID"
+    for n, q in enumerate(variant, 1):
+        cells = table.add_row().cells
+        cells[0].text, cells[1].text, cells[2].text = str(n), ", ".join(q["correct"]), str(q["source_id"])
+
+    doc.save(path)
+
+# --- 3. WORKER PROCESSES ---
+
+def init_worker(questions, job):
+    global _worker_job
+    _worker_job = (questions, job)
+
+def export_variant(variant_no):
+    """Builds and writes one variant (paper + key). Runs inside a worker process."""
+    questions, job = _worker_job
+    variant = build_variant(questions, variant_no, job["seed"], job["questions"])
+    file_stem = os.path.join(job["out_dir"], f"{job['slug']}_variant_{variant_no:03d}")
+    write_exam_paper(variant, f"{file_stem}.docx", job["title"], variant_no)
+    write_answer_key(variant, f"{file_stem}_answer_key.docx", job["title"], variant_no)
+    return variant_no
+
+def load_bank(path):
+    with open(path, "rb") as f:
+        questions = parse_question_file(io.BytesIO(f.read()), os.path.basename(path))
+    if questions is None:
+        raise SystemExit(f"Unsupported file type: {path} (expected .docx or .txt)")
+    if not questions:
+        raise SystemExit(f"Could not find any questions in {path}. Please check the format.")
+    return questions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export seeded, shuffled exam papers and answer keys as .docx files.")
+    parser.add_argument("bank", help="Question bank file (.docx or .txt).")
+    parser.add_argument("--variants", type=int, default=10, help="Number of exam variants to produce (default: 10).")
+    parser.add_argument("--questions", type=int, default=65, help="Questions per paper; capped at the bank size (default: 65).")
+    parser.add_argument("--seed", default="0", help="Seed for question/option shuffles; same seed, same papers (default: 0).")
+    parser.add_argument("--title", help="Title printed on every paper (default: bank file name).")
+    parser.add_argument("--out", default="exam_papers", help="Output folder (default: ./exam_papers).")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: one per CPU core).")
+    args = parser.parse_args(argv)
+
+    questions = load_bank(args.bank)
+    bank_name = os.path.basename(args.bank).rsplit('.', 1)[0]
+    os.makedirs(args.out, exist_ok=True)
+    job = {
+        "seed": args.seed,
+        "questions": args.questions,
+        "title": args.title or bank_name,
+        "slug": re.sub(r'[^A-Za-z0-9]+', '_', bank_name).strip('_') or "exam",
+        "out_dir": args.out,
+    }
+
+    workers = args.workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(questions, job)) as pool:
+        chunk_size = max(1, args.variants // (workers * 4))
+        for done, variant_no in enumerate(pool.map(export_variant, range(1, args.variants + 1), chunksize=chunk_size), 1):
+            if done % 10 == 0 or done == args.variants:
+                print(f"  {done}/{args.variants} variants written", flush=True)
+
+    elapsed = time.perf_counter() - started
+    print(f"Exported {args.variants} variants x {min(args.questions, len(questions))} questions to {args.out} "
+          f"in {elapsed:.1f}s using {workers} worker process(es).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
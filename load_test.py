@@ -0,0 +1,228 @@
+# Concurrent-session load test for quiz_app1.py
+# ----------------------------------------------------------------------
+# Simulates N browser sessions clicking through Exam Mode and Study Mode with
+# Streamlit's AppTest (no browser or server needed). All sessions stay open
+# and their clicks are interleaved round-robin in one process, the way a single
+# worker serializes script runs. Reports:
+#   - p50 / p95 / p99 rerun latency
+#   - CPU time per click
+#   - RSS growth per open session
+#   - rendered payload per click (bytes of element protos the rerun sends to the browser)
+# Any configured threshold that is exceeded makes the run exit with code 1.
+#
+# USAGE:
+#    python load_test.py --sessions 20 --questions 15
+#    python load_test.py --sessions 50 --max-p95-ms 300 --max-rss-mb-per-session 5
+# ----------------------------------------------------------------------
+
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import time
+
+from streamlit.testing.v1 import AppTest
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "quiz_app1.py")
+RUN_TIMEOUT = 60 # seconds allowed for a single rerun before AppTest gives up
+
+# --- 1. HELPERS ---
+
+def current_rss_bytes():
+    """Current resident set size of this process (falls back to peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def element_payload_bytes(node):
+    """
+    Serialized size of every element and block proto in a rendered tree. This is the delta payload a rerun
+    pushes over the websocket (minus a few bytes of message envelope per element).
+    """
+    proto = getattr(node, "proto", None)
+    total = proto.ByteSize() if proto is not None else 0
+    children = getattr(node, "children", None)
+    if isinstance(children, dict):
+        total += sum(element_payload_bytes(child) for child in children.values())
+    return total
+
+def new_session():
+    return AppTest.from_file(APP_FILE, default_timeout=RUN_TIMEOUT)
+
+def wait_for_bank_library(timeout):
+    """Runs a probe session until the server-side bank library has finished warming. Returns the bank names."""
+    deadline = time.time() + timeout
+    while True:
+        probe = new_session().run()
+        bank_select = probe.selectbox[0]
+        labels = [bank_select.format_func(option) for option in bank_select.options]
+        if not any("loading" in label for label in labels):
+            return [option for option in bank_select.options if option != bank_select.options[-1]] # Last entry is "Upload"
+        if time.time() > deadline:
+            raise SystemExit("Bank library did not finish warming up in time.")
+        time.sleep(0.5)
+
+# --- 2. CLICK SCRIPTS ---
+# Each script drives one session and yields the element (or AppTest) whose .run() performs the next click.
+
+def start_quiz_clicks(at, bank, mode):
+    at.run()
+    at.selectbox[0].set_value(bank)
+    yield at
+    yield at.radio(key="quiz_mode_radio").set_value(mode)
+    yield at.button(key="start_quiz_btn").click()
+
+def exam_mode_clicks(at, bank, questions, rng):
+    """Picks an answer, submits, moves on; then browses the results review."""
+    yield from start_quiz_clicks(at, bank, "Exam Mode")
+    for _ in range(questions):
+        if at.radio:
+            option_radio = at.radio[0]
+            yield option_radio.set_value(rng.choice(option_radio.options))
+        else:
+            for checkbox in rng.sample(list(at.checkbox), k=min(2, len(at.checkbox))):
+                yield checkbox.check()
+        yield at.button(key="submit_btn").click()
+        next_keys = [b.key for b in at.button if b.key in ("next_btn", "finish_btn")]
+        if next_keys and next_keys[0] == "finish_btn":
+            yield at.button(key="finish_btn").click()
+            break
+        yield at.button(key="next_btn").click()
+    else:
+        yield at.button(key="end_btn").click()
+    yield at.radio(key="review_filter").set_value("❌ Wrong")
+    yield at.radio(key="review_filter").set_value("All")
+
+def study_mode_clicks(at, bank, questions, rng):
+    """Reveals the answer and moves forward, occasionally stepping back."""
+    yield from start_quiz_clicks(at, bank, "Study Mode")
+    for _ in range(questions):
+        yield at.button(key="show_btn").click()
+        if rng.random() < 0.1 and [b for b in at.button if b.key == "prev_study_btn"]:
+            yield at.button(key="prev_study_btn").click()
+        if not [b for b in at.button if b.key == "next_study_btn"]:
+            break
+        yield at.button(key="next_study_btn").click()
+
+# --- 3. RUNNER ---
+
+def open_session(session_no, banks, args):
+    """Creates one simulated session and its click script."""
+    rng = random.Random(args.seed + session_no)
+    at = new_session()
+    script = exam_mode_clicks if (args.mode == "exam" or (args.mode == "mixed" and session_no % 2 == 0)) else study_mode_clicks
+    return at, script(at, rng.choice(banks), args.questions, rng)
+
+def drive_sessions(sessions):
+    """
+    Advances every session by one click per round until all scripts finish.
+    AppTest is not thread-safe, so sessions are interleaved instead of run on threads.
+    Returns the rerun latency (ms) and rendered payload (bytes) of every click.
+    """
+    latencies = []
+    payloads = []
+    active = list(enumerate(sessions))
+    while active:
+        still_active = []
+        for session_no, (at, script) in active:
+            pending = next(script, None)
+            if pending is None:
+                continue
+            started = time.perf_counter()
+            pending.run()
+            latencies.append((time.perf_counter() - started) * 1000)
+            if at.exception:
+                raise RuntimeError(f"Session {session_no} raised: {at.exception[0].message}")
+            payloads.append(element_payload_bytes(at._tree))
+            still_active.append((session_no, (at, script)))
+        active = still_active
+    return latencies, payloads
+
+def run_load_test(args):
+    banks = wait_for_bank_library(args.warmup_timeout)
+    if args.bank:
+        banks = [b for b in banks if args.bank.lower() in b.lower()] or banks
+
+    rss_before = current_rss_bytes()
+    cpu_before = time.process_time()
+    wall_before = time.perf_counter()
+
+    # Sessions are kept open until the end so their session state counts towards RSS
+    open_sessions = [open_session(n, banks, args) for n in range(args.sessions)]
+    latencies, payloads = drive_sessions(open_sessions)
+
+    wall_s = time.perf_counter() - wall_before
+    cpu_s = time.process_time() - cpu_before
+    rss_growth = current_rss_bytes() - rss_before
+
+    ordered = sorted(latencies)
+    report = {
+        "sessions": args.sessions,
+        "clicks": len(ordered),
+        "wall_s": round(wall_s, 2),
+        "clicks_per_s": round(len(ordered) / wall_s, 1) if wall_s else 0.0,
+        "p50_ms": round(percentile(ordered, 50), 1),
+        "p95_ms": round(percentile(ordered, 95), 1),
+        "p99_ms": round(percentile(ordered, 99), 1),
+        "max_ms": round(ordered[-1], 1) if ordered else 0.0,
+        "cpu_ms_per_click": round(cpu_s * 1000 / len(ordered), 2) if ordered else 0.0,
+        "rss_mb_per_session": round(rss_growth / (1024 * 1024) / len(open_sessions), 3),
+        "payload_kb_per_click": round(sum(payloads) / 1024 / len(payloads), 2) if payloads else 0.0,
+    }
+    return report
+
+def check_thresholds(report, args):
+    """Returns a list of human readable threshold violations."""
+    limits = [
+        ("p50_ms", args.max_p50_ms),
+        ("p95_ms", args.max_p95_ms),
+        ("p99_ms", args.max_p99_ms),
+        ("cpu_ms_per_click", args.max_cpu_ms_per_click),
+        ("rss_mb_per_session", args.max_rss_mb_per_session),
+        ("payload_kb_per_click", args.max_payload_kb_per_click),
+    ]
+    return [f"{name} = {report[name]} exceeds limit {limit}" for name, limit in limits if limit is not None and report[name] > limit]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for the Exam Simulator.")
+    parser.add_argument("--sessions", type=int, default=10, help="Number of simulated sessions (default: 10).")
+    parser.add_argument("--questions", type=int, default=10, help="Questions each session answers (default: 10).")
+    parser.add_argument("--mode", choices=["mixed", "exam", "study"], default="mixed", help="Click script to run (default: mixed).")
+    parser.add_argument("--bank", help="Only use library banks whose file name contains this text.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for answer choices (default: 0).")
+    parser.add_argument("--warmup-timeout", type=float, default=60, help="Seconds to wait for the bank library (default: 60).")
+    parser.add_argument("--json", dest="json_path", help="Also write the report to this JSON file.")
+    parser.add_argument("--max-p50-ms", type=float, help="Fail if median rerun latency exceeds this.")
+    parser.add_argument("--max-p95-ms", type=float, help="Fail if p95 rerun latency exceeds this.")
+    parser.add_argument("--max-p99-ms", type=float, help="Fail if p99 rerun latency exceeds this.")
+    parser.add_argument("--max-cpu-ms-per-click", type=float, help="Fail if CPU time per click exceeds this.")
+    parser.add_argument("--max-rss-mb-per-session", type=float, help="Fail if RSS growth per session exceeds this.")
+    parser.add_argument("--max-payload-kb-per-click", type=float, help="Fail if the mean rendered payload per click exceeds this.")
+    args = parser.parse_args(argv)
+
+    report = run_load_test(args)
+    for name, value in report.items():
+        print(f"{name:>20}: {value}")
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    violations = check_thresholds(report, args)
+    for violation in violations:
+        print(f"FAIL: {violation}")
+    return 1 if violations else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,13 +2,12 @@
 # ----------------------------------------------------------------------
 # INSTRUCTIONS:
 # 1. Open your terminal or command prompt and run:
-#    pip install streamlit python-docx pyperclip
+#    pip install streamlit python-docx pyperclip numpy pillow
 # 2. Run the application in the folder where you saved the file:
 #    streamlit run quiz_app.py
 # ----------------------------------------------------------------------
 
 import streamlit as st
-from docx import Document
 import random
 import time
 import streamlit.components.v1 as components
@@ -16,240 +15,518 @@ import re
 import io
 import urllib.parse
 import pyperclip
+import os
+import hashlib
+import threading
+import html
+import heapq
+import itertools
+import pickle
+import zlib
+import sys
+import tempfile
+import uuid
+import json
+import functools
+import logging
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from exam_core import (
+    VALID_OPTIONS, APP_DIR,
+    get_raw_option_text, parse_question_file, iter_question_file,
+    get_user_answer_chars, is_answer_correct
+)
 
-# --- CONSTANTS FOR EXTENDED OPTIONS ---
-VALID_OPTIONS = ["A", "B", "C", "D", "E", "F"]
-VALID_OPTION_CHARS_PATTERN = r'[a-fA-F]'
+logger = logging.getLogger("exam_simulator")
 
-# --- 1. PARSING LOGIC & HELPERS ---
+# --- SERVER-SIDE BANK LIBRARY ---
+# Folder scanned for bundled question banks (.docx / .txt); every such file in it is offered as a bank.
+# Override with the QUIZ_BANK_DIR environment variable.
+BANK_LIBRARY_DIR = os.environ.get("QUIZ_BANK_DIR", os.path.join(APP_DIR, "banks"))
+BANK_FILE_TYPES = ["docx", "txt"]
+UPLOAD_OWN_FILE = "📤 Upload my own file..."
 
-def is_valid_option_format(text):
-    """Checks if a string starts with A-F followed by a separator and contains content."""
-    if len(text) < 2 or text[0].upper() not in VALID_OPTIONS:
-        return False
-    
-    # Check for standard separators: A: or A. or A)
-    is_valid_separator = text[1] in [":", ".", ")"]
-    # Check for parenthesis format: (A)
-    is_valid_parenthesis = text.startswith("(") and len(text) >= 3 and text[2] == ')' and text[1].upper() in VALID_OPTIONS
-    
-    content_after_prefix = ""
-    if is_valid_separator:
-        # Check content after 'A.', 'B:', etc.
-        content_after_prefix = re.sub(r'^[a-zA-Z][.:\)]\s*', '', text).strip()
-    elif is_valid_parenthesis:
-        # Check content after '(A)', '(B)', etc.
-        content_after_prefix = re.sub(r'^\([a-zA-Z]\)\s*', '', text).strip()
-
-    return bool(content_after_prefix)
-
-def get_raw_option_text(option_text):
-    """Strips any leading option prefix (A:, B., (C)) from the text."""
-    # Pattern to match and remove prefixes: (optional parenthesis) Letter (:, ., or )) (optional parenthesis)
-    return re.sub(r'^\s*[\(]?[a-zA-Z][\.:\)]?\s*', '', option_text).strip()
-
-def add_option_prefixes(raw_option_texts):
-    """Generates the A:, B:, C: prefixes automatically for a list of raw option texts."""
-    prefixed_options = []
-    for i, text in enumerate(raw_option_texts):
-        if i < len(VALID_OPTIONS):
-            prefix = VALID_OPTIONS[i]
-            prefixed_options.append(f"{prefix}: {text}")
-        else:
-            prefixed_options.append(text)
-    return prefixed_options
+# --- DOCX IMAGE ASSETS ---
+# Extracted images live in exam_core.ASSET_DIR (./static/question_assets) and are served from this URL.
+ASSET_URL_PREFIX = "app/static/question_assets"
 
+# --- STATIC THEME ---
+# static/theme.css is served by Streamlit's static file server; the content hash in the URL makes browsers
+# fetch a fresh copy only after the file changes.
+THEME_CSS_FILE = os.path.join(APP_DIR, "static", "theme.css")
+with open(THEME_CSS_FILE, "rb") as f:
+    THEME_CSS_URL = f"app/static/theme.css?v={hashlib.sha256(f.read()).hexdigest()[:12]}"
 
-def parse_docx(uploaded_file):
-    """Parses questions and options from a DOCX file, storing RAW option text."""
-    doc = Document(uploaded_file)
-    questions = []
-    current_question_lines = []
-    raw_options = [] # Store raw option text without generated prefix
-    q_id = 1
-    
-    for para in doc.paragraphs:
-        text = para.text.strip()
-        if not text: continue
-        
-        text_lower = text.lower()
-        
-        # 1. Answer Line Detection: Finalize the current question
-        if text_lower.startswith("correct answer") or text_lower.startswith("answer"):
-            if current_question_lines and len(raw_options) >= 2:
-                clean_line = text_lower.replace("correct answer", "").replace("answer", "").replace(":", "").strip()
-                found_answers = re.findall(VALID_OPTION_CHARS_PATTERN, clean_line)
-                correct_list = sorted(list(set([x.upper() for x in found_answers])))
-                
-                questions.append({
-                    "id": q_id,
-                    "question": "\n".join(current_question_lines).strip(),
-                    "options": raw_options, # Store RAW options
-                    "correct": correct_list
-                })
-                q_id += 1
-            # Reset for the next question
-            current_question_lines = []
-            raw_options = []
-            
-        # 2. Option Detection: Starts an option sequence
-        elif is_valid_option_format(text):
-            # Extract raw text and store it
-            raw_text = get_raw_option_text(text)
-            raw_options.append(raw_text)
-                
-        # 3. Question Text: If we haven't started options, this must be question text.
-        elif len(raw_options) == 0:
-            current_question_lines.append(text)
-                
-    return questions
+# --- TOPIC TAGGING ---
+# Optional JSON file {"Topic": ["keyword", ...]} replacing the default topic list below.
+TOPICS_FILE = os.environ.get("QUIZ_TOPICS_FILE", os.path.join(APP_DIR, "topics.json"))
+TOPIC_TOKEN_PATTERN = re.compile(r"[a-z0-9]{2,}")
+MIN_TOPIC_SCORE = 0.05 # Cosine similarity below this falls back to GENERAL_TOPIC
+GENERAL_TOPIC = "General"
+DEFAULT_TOPIC_KEYWORDS = {
+    "Compute": ["ec2", "instance", "lambda", "serverless", "container", "ecs", "eks", "fargate", "elastic beanstalk", "auto scaling", "batch", "lightsail"],
+    "Storage": ["s3", "bucket", "ebs", "efs", "glacier", "storage", "volume", "snapshot", "backup", "object", "storage gateway", "snowball"],
+    "Databases": ["rds", "dynamodb", "aurora", "database", "sql", "nosql", "redshift", "elasticache", "query", "table", "replica"],
+    "Networking & Content Delivery": ["vpc", "subnet", "route 53", "cloudfront", "dns", "gateway", "load balancer", "elb", "direct connect", "vpn", "cdn", "edge location", "peering"],
+    "Security & Identity": ["iam", "security", "policy", "encryption", "kms", "shield", "waf", "mfa", "compliance", "role", "permission", "credentials", "guardduty", "inspector"],
+    "Billing & Pricing": ["cost", "pricing", "billing", "budget", "savings", "reserved", "on demand", "spot", "support plan", "invoice", "free tier", "cost explorer"],
+    "Management & Monitoring": ["cloudwatch", "cloudtrail", "config", "trusted advisor", "monitoring", "logs", "cloudformation", "systems manager", "well architected", "organizations"],
+    "AI & Prompt Engineering": ["prompt", "model", "learning", "llm", "gpt", "ai", "token", "training", "neural", "shot", "generative", "chatbot"],
+    "Telecom & Transmission": ["sdh", "stm", "dwdm", "sonet", "multiplexing", "fiber", "optical", "wavelength", "frame", "bandwidth", "signal", "edfa", "telecom"],
+}
 
-def parse_txt(uploaded_file):
-    """Parses questions and options from a TXT file, storing RAW option text."""
-    content = uploaded_file.getvalue().decode("utf-8")
-    lines = content.splitlines()
-    questions = []
-    current_question_lines = []
-    raw_options = [] # Store raw option text without generated prefix
-    q_id = 1
-    
-    for line in lines:
-        text = line.strip()
-        if not text: continue
-        
-        text_lower = line.strip().lower()
-        
-        # 1. Answer Line Detection: Finalize the current question
-        if text_lower.startswith("correct answer") or text_lower.startswith("answer"):
-            if current_question_lines and len(raw_options) >= 2:
-                clean_line = text_lower.replace("correct answer", "").replace("answer", "").replace(":", "").strip()
-                found_answers = re.findall(VALID_OPTION_CHARS_PATTERN, clean_line)
-                correct_list = sorted(list(set([x.upper() for x in found_answers])))
-                
-                questions.append({
-                    "id": q_id,
-                    "question": "\n".join(current_question_lines).strip(),
-                    "options": raw_options, # Store RAW options
-                    "correct": correct_list
-                })
-                q_id += 1
-            # Reset for the next question
-            current_question_lines = []
-            raw_options = []
-            
-        # 2. Option Detection: Starts an option sequence
-        elif is_valid_option_format(text):
-            # Extract raw text and store it
-            raw_text = get_raw_option_text(text)
-            raw_options.append(raw_text)
-                
-        # 3. Question Text: If we haven't started options, this must be question text.
-        elif len(raw_options) == 0:
-            current_question_lines.append(text)
-                
+# --- EXAM TIME BUDGETS (defaults for the setup screen; 0 = no limit) ---
+DEFAULT_QUESTION_TIME_LIMIT = 180 # seconds per question
+DEFAULT_EXAM_TIME_LIMIT = 0 # minutes for the whole exam
+
+# --- IDLE SESSION SPILL ---
+# Heavy per-session state is written to disk after this many idle seconds (QUIZ_IDLE_SPILL_SECONDS, 0 = never).
+IDLE_SPILL_SECONDS = int(os.environ.get("QUIZ_IDLE_SPILL_SECONDS", 15 * 60))
+SPILL_DIR = os.environ.get("QUIZ_SPILL_DIR", os.path.join(tempfile.gettempdir(), "exam_simulator_spill"))
+SPILL_RETENTION_SECONDS = 24 * 60 * 60 # Snapshots of tabs that never come back are deleted after a day
+# Widget callbacks run before the script body restores these, so callbacks that read them use @restores_idle_state
+SPILLABLE_STATE_KEYS = ["quiz_data", "user_answers", "shuffled_options_map", "question_times"]
+# Operators only: QUIZ_SHOW_WORKER_MEMORY=1 adds the per-session memory table (every open session) to the setup screen
+SHOW_WORKER_MEMORY = os.environ.get("QUIZ_SHOW_WORKER_MEMORY", "").lower() in ("1", "true", "yes")
+
+# --- BACKGROUND PARSING (uploads start on their first questions while the rest is parsed) ---
+PARSE_PROGRESS_REFRESH_SECONDS = 1 # How often the progress bar picks up newly parsed questions
+PARSE_CANCEL_WAIT_SECONDS = 2 # How long Stop Loading waits for the parser thread to wind down
+
+# --- FULL EXAM REVIEW ---
+REVIEW_FILTERS = ["All", "❌ Wrong", "❓ Follow Up", "⏰ Timed Out"]
+REVIEW_PAGE_SIZES = [10, 25, 50]
+
+# --- CUSTOM COMPONENTS ---
+# Keyboard answer pad for Exam Mode (plain HTML/JS, no build step)
+answer_pad = components.declare_component("answer_pad", path=os.path.join(APP_DIR, "components", "answer_pad"))
+# Header clock and per-question countdown; they tick in the browser and reruns only send the current seconds.
+# A countdown reaching zero sends a value, which reruns the session even if the server-side rerun failed.
+exam_timer = components.declare_component("exam_timer", path=os.path.join(APP_DIR, "components", "exam_timer"))
+
+# --- 1. SHARED SERVER RESOURCES (topics, bank library, deadlines, idle spill, background parsing) ---
+
+def load_topic_keywords():
+    """Topic keyword lists from TOPICS_FILE ({"Topic": ["keyword", ...]}) if present, otherwise the built-in defaults."""
+    if os.path.exists(TOPICS_FILE):
+        try:
+            with open(TOPICS_FILE, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return DEFAULT_TOPIC_KEYWORDS
+
+def tokenize_for_topics(text):
+    return TOPIC_TOKEN_PATTERN.findall(text.lower())
+
+def tag_question_topics(questions, topic_keywords=None):
+    """
+    Adds a "topic" to every question in place. Builds one sparse TF-IDF matrix (COO: rows, cols, weights)
+    over question + option text for the whole bank, turns each topic's keyword list into an IDF-weighted
+    centroid in the same space, and picks the most cosine-similar topic per question. Everything after
+    tokenizing is vectorized with numpy, so large banks tag in seconds.
+    """
+    if not questions:
+        return questions
+    topic_keywords = topic_keywords or load_topic_keywords()
+    topic_names = list(topic_keywords.keys())
+
+    # 1. Tokenize and map terms to column ids (one pass over the text)
+    vocabulary = {}
+    docs = [tokenize_for_topics(q["question"] + " " + " ".join(q["options"])) for q in questions]
+    term_ids = np.fromiter((vocabulary.setdefault(tok, len(vocabulary)) for doc in docs for tok in doc), dtype=np.int64)
+    doc_lengths = np.fromiter((len(doc) for doc in docs), dtype=np.int64, count=len(docs))
+    n_docs, n_terms = len(questions), max(len(vocabulary), 1)
+
+    # 2. Sparse term counts per (question, term), then sublinear TF x smoothed IDF, L2-normalized rows
+    doc_ids = np.repeat(np.arange(n_docs, dtype=np.int64), doc_lengths)
+    pair_keys, term_counts = np.unique(doc_ids * n_terms + term_ids, return_counts=True)
+    rows, cols = pair_keys // n_terms, pair_keys % n_terms
+    doc_freq = np.bincount(cols, minlength=n_terms)
+    idf = np.log((1 + n_docs) / (1 + doc_freq)) + 1
+    weights = (1 + np.log(term_counts)) * idf[cols]
+    row_norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=n_docs))
+    weights = weights / np.where(row_norms > 0, row_norms, 1)[rows]
+
+    # 3. Topic centroids: IDF-weighted keyword vectors in the bank's term space (unknown keywords are ignored)
+    centroids = np.zeros((len(topic_names), n_terms))
+    for t, name in enumerate(topic_names):
+        keyword_ids = [vocabulary[tok] for kw in topic_keywords[name] for tok in tokenize_for_topics(kw) if tok in vocabulary]
+        if keyword_ids:
+            centroids[t, keyword_ids] = idf[keyword_ids]
+            centroids[t] /= np.linalg.norm(centroids[t])
+
+    # 4. Cosine similarity of every question with every topic (sparse x dense, one bincount per topic)
+    scores = np.stack([np.bincount(rows, weights=weights * centroids[t, cols], minlength=n_docs) for t in range(len(topic_names))], axis=1) if topic_names else np.zeros((n_docs, 1))
+    best_topic = scores.argmax(axis=1)
+    best_score = scores.max(axis=1)
+
+    for q, t, score in zip(questions, best_topic.tolist(), best_score.tolist()):
+        q["topic"] = topic_names[t] if score >= MIN_TOPIC_SCORE else GENERAL_TOPIC
     return questions
 
+class BankLibrary:
+    """
+    Catalog of question banks found in BANK_LIBRARY_DIR.
+    Banks are parsed once per server by a background thread and shared (read-only) by every session.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.entries = {} # {file_name: {status, questions, count, hash, error}}
+        self._pending = [] # Warm-up order; on-demand requests jump to the front
+        self._cond = threading.Condition()
+
+        file_names = os.listdir(folder) if os.path.isdir(folder) else []
+        for file_name in sorted(file_names):
+            if file_name.split('.')[-1].lower() in BANK_FILE_TYPES:
+                self.entries[file_name] = {"status": "pending", "questions": None, "count": None, "hash": None, "error": None}
+                self._pending.append(file_name)
+
+        self._worker = threading.Thread(target=self._warm_up, name="bank-library-warmer", daemon=True)
+        self._worker.start()
+
+    def names(self):
+        return list(self.entries.keys())
+
+    def describe(self, file_name):
+        """Dropdown label: bank name, question count and content hash (or its loading state)."""
+        entry = self.entries.get(file_name)
+        if entry is None:
+            return file_name
+        bank_name = file_name.rsplit('.', 1)[0]
+        if entry["status"] == "ready":
+            return f"{bank_name} — {entry['count']} questions · #{entry['hash']}"
+        if entry["status"] == "error":
+            return f"{bank_name} — ⚠️ could not be loaded"
+        return f"{bank_name} — ⏳ loading..."
+
+    def get_questions(self, file_name):
+        """Returns the shared parsed question list, or None (and moves the bank to the front of the queue) if it is not warmed yet."""
+        entry = self.entries[file_name]
+        if entry["status"] == "ready":
+            return entry["questions"]
+        with self._cond:
+            if file_name in self._pending:
+                self._pending.remove(file_name)
+                self._pending.insert(0, file_name)
+                self._cond.notify()
+        return None
+
+    def get_error(self, file_name):
+        """The load error of a bank that could not be parsed, else None."""
+        entry = self.entries[file_name]
+        return entry["error"] if entry["status"] == "error" else None
+
+    def _warm_up(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                file_name = self._pending.pop(0)
+            self._load(file_name)
+
+    def _load(self, file_name):
+        entry = self.entries[file_name]
+        entry["status"] = "loading"
+        try:
+            with open(os.path.join(self.folder, file_name), "rb") as f:
+                data = f.read()
+            questions = tag_question_topics(parse_question_file(io.BytesIO(data), file_name) or [])
+            entry["hash"] = hashlib.sha256(data).hexdigest()[:12]
+            entry["count"] = len(questions)
+            entry["questions"] = questions
+            entry["status"] = "ready"
+        except Exception as e:
+            entry["error"] = str(e)
+            entry["status"] = "error"
+
+@st.cache_resource(show_spinner=False)
+def get_bank_library():
+    """One BankLibrary per server process; the first script run starts warming every bank in the background."""
+    return BankLibrary(BANK_LIBRARY_DIR)
+
+class DeadlineScheduler:
+    """
+    One min-heap of (deadline, seq, callback) entries shared by every session on the server.
+    A single thread sleeps until the earliest deadline and fires it, so sessions are never polled.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count() # Tie-breaker so callbacks are never compared
+        self._cond = threading.Condition()
+        self._worker = threading.Thread(target=self._run, name="exam-deadline-scheduler", daemon=True)
+        self._worker.start()
+
+    def schedule(self, deadline, callback):
+        """Runs callback() on the scheduler thread at the given time.time() deadline. Returns a token for cancel()."""
+        entry = [deadline, next(self._seq), callback]
+        with self._cond:
+            heapq.heappush(self._heap, entry)
+            if self._heap[0] is entry:
+                self._cond.notify() # New earliest deadline: wake the worker to shorten its sleep
+        return entry
+
+    def cancel(self, entry):
+        """Cancelled entries stay in the heap and are dropped when they come due."""
+        if entry is not None:
+            with self._cond:
+                entry[2] = None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.time():
+                    self._cond.wait(self._heap[0][0] - time.time() if self._heap else None)
+                _, _, callback = heapq.heappop(self._heap)
+            if callback is not None:
+                try:
+                    callback()
+                except Exception:
+                    logger.exception("Deadline callback failed")
+
+@st.cache_resource(show_spinner=False)
+def get_deadline_scheduler():
+    """One DeadlineScheduler per server process."""
+    return DeadlineScheduler()
+
+def request_session_rerun(session_id):
+    """
+    Best effort: asks Streamlit to rerun a session so an idle tab picks up a server-side timeout without a click.
+    Uses Runtime internals; if they change, the exam_timer component still reruns the tab when its clock hits zero.
+    """
+    if not Runtime.exists():
+        return # Bare mode / AppTest: the timeout is still recorded and shown on the next run
+    try:
+        runtime = Runtime.instance()
+        session_info = runtime._session_mgr.get_active_session_info(session_id)
+        if session_info is not None:
+            runtime._get_async_objs().eventloop.call_soon_threadsafe(session_info.session.request_rerun, None)
+    except Exception:
+        logger.warning("Could not rerun session %s after a timeout; relying on its browser timer", session_id, exc_info=True)
+
+def estimate_state_bytes(obj, seen=None):
+    """Rough deep size of plain session data (dicts, lists, tuples, strings, numbers)."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_state_bytes(k, seen) + estimate_state_bytes(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(estimate_state_bytes(item, seen) for item in obj)
+    return size
+
+class IdleSessionManager:
+    """
+    Spills the heavy state of idle sessions (SPILLABLE_STATE_KEYS) to a compressed on-disk snapshot and
+    frees it, then restores it in place on the session's next run. Idle deadlines use the shared
+    DeadlineScheduler, which only hands the spill to this manager's own worker thread, so pickling and disk
+    writes never delay other sessions' exam timeouts. Questions of library banks are spilled as IDs only,
+    since the library keeps them.
+    """
+
+    def __init__(self, folder, idle_seconds, scheduler, bank_library):
+        self.folder = folder
+        self.idle_seconds = idle_seconds
+        self.scheduler = scheduler
+        self.bank_library = bank_library
+        self.sessions = {} # {session_token: {refs, bank, last_seen, idle_token, spilled, snapshot_bytes}}
+        self._lock = threading.Lock()
+        self._spill_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="idle-spill")
+        os.makedirs(folder, exist_ok=True)
+
+    def touch(self, session_token, state_refs, bank_name):
+        """
+        Called at the top of every run with the session's current heavy containers.
+        Rehydrates a spilled session and marks it active. Each session keeps a single pending idle check, which
+        re-arms itself from last_seen, so frequent runs do not pile up entries in the scheduler heap.
+        Returns False if the spilled state was lost (its containers stay empty).
+        """
+        with self._lock:
+            record = self.sessions.setdefault(session_token, {"idle_token": None, "spilled": False, "snapshot_bytes": 0})
+            if record["spilled"]:
+                restored = self._rehydrate(session_token, record)
+                self.scheduler.cancel(record["idle_token"]) # Pending entry was the retention check
+                record["idle_token"] = None
+            else:
+                restored = True
+            record["refs"] = state_refs
+            record["bank"] = bank_name
+            record["last_seen"] = time.time()
+            if record["idle_token"] is None:
+                record["idle_token"] = self.scheduler.schedule(record["last_seen"] + self.idle_seconds, lambda: self._spill_worker.submit(self._spill, session_token))
+        return restored
+
+    def memory_report(self):
+        """One row per known session: whether its state is resident or spilled, and how many bytes it holds."""
+        rows = []
+        now = time.time()
+        with self._lock:
+            records = list(self.sessions.items())
+        for session_token, record in records:
+            try:
+                resident = 0 if record["spilled"] else sum(
+                    sys.getsizeof(obj) if (name == "quiz_data" and record["bank"]) else estimate_state_bytes(obj)
+                    for name, obj in record["refs"].items()
+                )
+            except RuntimeError: # Container changed size while another session's run was mutating it
+                resident = None
+            rows.append({
+                "Session": session_token[:8],
+                "State": "💾 Spilled" if record["spilled"] else "🟢 Resident",
+                "Idle (s)": int(now - record["last_seen"]),
+                "Resident KB": round(resident / 1024, 1) if resident is not None else None,
+                "Snapshot KB": round(record["snapshot_bytes"] / 1024, 1),
+            })
+        return rows
+
+    def _snapshot_path(self, session_token):
+        return os.path.join(self.folder, f"{session_token}.snapshot")
+
+    def _spill(self, session_token):
+        with self._lock:
+            record = self.sessions.get(session_token)
+            if record is None or record["spilled"]:
+                return
+            record["idle_token"] = None
+            idle_deadline = record["last_seen"] + self.idle_seconds
+            if time.time() < idle_deadline: # Active since this check was armed: check again later
+                record["idle_token"] = self.scheduler.schedule(idle_deadline, lambda: self._spill_worker.submit(self._spill, session_token))
+                return
+            refs = record["refs"]
+            seen_at = record["last_seen"]
+            snapshot = {name: obj.copy() for name, obj in refs.items()}
+            if record["bank"]:
+                snapshot["quiz_data"] = [q["id"] for q in refs["quiz_data"]]
+
+        # Serialize and write without holding the lock, so other sessions' touch() is not blocked
+        path = self._snapshot_path(session_token)
+        payload = zlib.compress(pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL))
+        try:
+            with open(path, "wb") as f:
+                f.write(payload)
+        except OSError:
+            logger.warning("Could not spill idle session %s; keeping it resident", session_token[:8], exc_info=True)
+            return # Re-armed by the session's next touch()
+
+        with self._lock:
+            if self.sessions.get(session_token) is not record or record["last_seen"] != seen_at:
+                os.remove(path) # The session came back while the snapshot was written
+                return
+            for obj in refs.values():
+                obj.clear() # In place, so the session state keeps pointing at the same (now empty) containers
+            record["spilled"] = True
+            record["snapshot_bytes"] = len(payload)
+            # A tab that never comes back is forgotten after SPILL_RETENTION_SECONDS
+            record["idle_token"] = self.scheduler.schedule(time.time() + SPILL_RETENTION_SECONDS, lambda: self._forget(session_token))
+
+    def _rehydrate(self, session_token, record):
+        """Restores a spilled session in place. Returns False if its snapshot is missing or unreadable."""
+        path = self._snapshot_path(session_token)
+        try:
+            with open(path, "rb") as f:
+                snapshot = pickle.loads(zlib.decompress(f.read()))
+        except (OSError, zlib.error, pickle.UnpicklingError, EOFError):
+            logger.warning("Could not restore spilled session %s", session_token[:8], exc_info=True)
+            if os.path.exists(path):
+                os.remove(path)
+            record["spilled"] = False
+            record["snapshot_bytes"] = 0
+            return False
+        os.remove(path)
+        if record["bank"]:
+            bank_questions = self.bank_library.get_questions(record["bank"]) or []
+            id_to_question_map = {q['id']: q for q in bank_questions}
+            snapshot["quiz_data"] = [id_to_question_map[q_id] for q_id in snapshot["quiz_data"] if q_id in id_to_question_map]
+        for name, obj in record["refs"].items():
+            if isinstance(obj, list):
+                obj[:0] = snapshot[name]
+            else:
+                # Entries written while spilled (e.g. a "Time Out" from the deadline scheduler) win
+                restored = dict(snapshot[name])
+                restored.update(obj)
+                obj.update(restored)
+        record["spilled"] = False
+        record["snapshot_bytes"] = 0
+        return True
+
+    def _forget(self, session_token):
+        with self._lock:
+            record = self.sessions.get(session_token)
+            if record is not None:
+                record["idle_token"] = None
+            if record is None or not record["spilled"] or time.time() - record["last_seen"] < SPILL_RETENTION_SECONDS:
+                return
+            del self.sessions[session_token]
+        if os.path.exists(self._snapshot_path(session_token)):
+            os.remove(self._snapshot_path(session_token))
+
+@st.cache_resource(show_spinner=False)
+def get_idle_session_manager():
+    """One IdleSessionManager per server process."""
+    return IdleSessionManager(SPILL_DIR, IDLE_SPILL_SECONDS, get_deadline_scheduler(), get_bank_library())
+
+class ParseJob:
+    """
+    Parses one uploaded bank on a background thread and publishes questions as they are produced, so the quiz
+    can start on the first ones. The thread only appends to self.questions; the session copies new entries into
+    its own state on each run (sync_parsed_questions), so idle spill never races the parser. Topics are tagged
+    once the whole bank is in, since TF-IDF needs every question.
+    """
+
+    def __init__(self, file_bytes, file_name):
+        self.file_name = file_name
+        self.questions = []
+        self.progress = 0.0 # Fraction of the file parsed so far
+        self.done = False
+        self.error = None
+        self._cancelled = threading.Event()
+        self._first_ready = threading.Event()
+        questions_iter = iter_question_file(io.BytesIO(file_bytes), file_name, progress=self._report_progress)
+        self.supported = questions_iter is not None
+        self._thread = threading.Thread(target=self._run, args=(questions_iter,), daemon=True)
+        if self.supported:
+            self._thread.start()
+
+    def _report_progress(self, done, total):
+        self.progress = done / total if total else 1.0
+
+    def _run(self, questions_iter):
+        try:
+            for question in questions_iter:
+                self.questions.append(question)
+                self._first_ready.set()
+                if self._cancelled.is_set():
+                    break
+            tag_question_topics(self.questions)
+        except Exception as e: # Reported to the session on its next run
+            self.error = e
+        finally:
+            self.done = True
+            self._first_ready.set()
+
+    def wait_for_first_question(self):
+        """Blocks until the first question is parsed (or the file turned out to have none)."""
+        self._first_ready.wait()
+
+    def cancel(self):
+        """Stops parsing after the current question. Questions parsed so far are kept (and tagged)."""
+        self._cancelled.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=PARSE_CANCEL_WAIT_SECONDS)
+
 # --- 2. PAGE CONFIG ---
 st.set_page_config(page_title="Exam Simulator", layout="wide")
 
 # --- 3. CUSTOM CSS (Cyan/Light Green Theme) ---
-st.markdown("""
-<style>
-    /* 1. CYAN BACKGROUND */
-    .stApp { background-color: #e0f7fa; color: #1f2937; } /* Light cyan background */
-    
-    /* 2. GENERAL TEXT COLOR */
-    h1, h2, h3, h4, h5, h6, p, label, .stMarkdown { color: #1f2937; } /* Dark text for contrast */
-
-    /* HIDE HEADER */
-    header {visibility: hidden;}
-    .block-container { padding-top: 1rem !important; padding-bottom: 5rem; }
-    
-    /* LIGHT GREEN PRIMARY BUTTONS (Replaces Orange) */
-    div.stButton > button[kind="primary"] {
-        background-color: #4CAF50 !important; /* Original Light Green */
-        border-color: #4CAF50 !important;
-        color: white !important;
-        font-weight: bold; /* BOLD TEXT */
-        font-size: 16px !important;
-        padding: 8px 20px !important;
-    }
-    div.stButton > button[kind="primary"]:hover {
-        background-color: #45a049 !important; /* Slightly darker hover */
-        border-color: #45a049 !important;
-    }
-    
-    /* SECONDARY BUTTONS (Replaces Orange) */
-    div.stButton > button[kind="secondary"] {
-        border: 2px solid #4CAF50;
-        color: #4CAF50;
-        font-weight: bold; /* BOLD TEXT */
-        background-color: #ffffff; /* White background */
-    }
-    div.stButton > button[kind="secondary"]:hover {
-        background-color: #f7fff7; /* Very light green hover */
-    }
-    
-    /* --- STUDY MODE: Answer Card --- */
-    .answer-card {
-        padding: 15px; border-left: 5px solid #15803d;
-        background-color: #f0fdf4; /* Light green background */
-        color: #15803d;
-        border-radius: 5px; margin-top: 10px;
-    }
-    .answer-card h5 { color: #15803d; margin: 0; }
-
-    /* Ensure options look normal (not greyed out) */
-    div[data-testid="stRadio"] label,
-    div[data-testid="stCheckbox"] label,
-    div[data-testid="stRadio"] div[data-baseweb="radio"] div:nth-child(2) p,
-    div[data-testid="stCheckbox"] div[data-baseweb="checkbox"] div:nth-child(2) p {
-        opacity: 1 !important;
-        color: #1f2937 !important; /* Dark text for contrast */
-    }
-    
-    /* Status Bar Pills */
-    .stat-pill {
-        padding: 6px 12px; border-radius: 20px; font-weight: 600; font-size: 13px; display: flex; align-items: center; white-space: nowrap;
-    }
-    .stat-blue { background-color: #eff6ff; color: #1d4ed8; border: 1px solid #dbeafe; }
-    .stat-green { background-color: #f0fdf4; color: #15803d; border: 1px solid #dcfce7; }
-    .stat-red { background-color: #fef2f2; color: #b91c1c; border: 1px solid #fee2e2; }
-    /* Yellow/Follow Up color */
-    .stat-yellow { background-color: #fff8e1; color: #d97706; border: 1px solid #fef3c7; }
-
-    /* CARDS */
-    .question-card {
-        background-color: #ffffff; /* White Card Background */
-        padding: 15px 20px; border-radius: 10px;
-        border: 1px solid #d1d5db;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        margin-bottom: 15px;
-    }
-    /* FIX: Ensure question text starts clean */
-    .question-text {
-        font-size: 20px !important; font-weight: 700; color: #1f2937; /* Dark text */
-        margin: 0;
-        white-space: pre-wrap;
-    }
-    
-    div.stButton > button { border-radius: 6px; }
-    
-    /* Subtle 'All The Best' */
-    .subtle-all-the-best {
-        text-align: center; font-size: 24px; font-weight: 600; color: #4b5563; /* Medium grey */
-        opacity: 0.8; animation: fadeIn 2s ease-in;
-    }
-    @keyframes fadeIn { 0% {opacity: 0;} 100% {opacity: 1;} }
-
-    /* Custom CSS to hide the radio/checkbox prefix (A:, B:, etc.) in Exam Mode */
-    /* This rule applies to all modes, but the displayed options are cleaned only in Exam Mode */
-    div[data-baseweb="radio"] > div:first-child p,
-    div[data-baseweb="checkbox"] > div:first-child p {
-        display: none !important;
-    }
-</style>
-""", unsafe_allow_html=True)
+# The theme lives in static/theme.css; the browser caches it and each rerun only re-sends this one-line link.
+st.markdown(f'<link rel="stylesheet" href="{THEME_CSS_URL}">', unsafe_allow_html=True)
 
 # --- 4. STATE INITIALIZATION ---
 if 'quiz_data' not in st.session_state: st.session_state.quiz_data = []
@@ -264,6 +541,41 @@ if 'quiz_mode' not in st.session_state: st.session_state.quiz_mode = None
 if 'follow_up_questions' not in st.session_state: st.session_state.follow_up_questions = []
 if 'show_answer_study' not in st.session_state: st.session_state.show_answer_study = False
 if 'shuffled_options_map' not in st.session_state: st.session_state.shuffled_options_map = {}
+if 'question_times' not in st.session_state: st.session_state.question_times = {}
+if 'question_time_limit' not in st.session_state: st.session_state.question_time_limit = DEFAULT_QUESTION_TIME_LIMIT
+if 'exam_time_limit' not in st.session_state: st.session_state.exam_time_limit = DEFAULT_EXAM_TIME_LIMIT * 60
+if 'exam_clock' not in st.session_state: st.session_state.exam_clock = {}
+if 'quiz_bank' not in st.session_state: st.session_state.quiz_bank = None # Library bank file name (None for uploads)
+if 'use_answer_pad' not in st.session_state: st.session_state.use_answer_pad = False
+if 'answer_pad_last_msg' not in st.session_state: st.session_state.answer_pad_last_msg = None
+if 'session_token' not in st.session_state: st.session_state.session_token = uuid.uuid4().hex
+if 'parse_job' not in st.session_state: st.session_state.parse_job = None # ParseJob of an upload still being parsed
+
+def touch_idle_session():
+    """
+    Restores this session's heavy state if it was spilled while idle, and restarts its idle countdown.
+    If the snapshot was lost, the session goes back to the setup screen and False is returned.
+    """
+    if IDLE_SPILL_SECONDS and not get_idle_session_manager().touch(
+        st.session_state.session_token,
+        {key: st.session_state[key] for key in SPILLABLE_STATE_KEYS},
+        st.session_state.quiz_bank
+    ):
+        go_to_main_screen()
+        st.session_state.spill_restore_failed = True
+        return False
+    return True
+
+def restores_idle_state(callback):
+    """
+    For on_click/on_change callbacks that read SPILLABLE_STATE_KEYS: Streamlit runs them before the script body,
+    so a session spilled while idle is restored first. If its state was lost, the callback is skipped.
+    """
+    @functools.wraps(callback)
+    def wrapper(*args, **kwargs):
+        if touch_idle_session():
+            return callback(*args, **kwargs)
+    return wrapper
 
 # --- 5. HELPER FUNCTIONS ---
 
@@ -293,9 +605,134 @@ def get_shuffled_options(q_id, raw_options, is_exam_mode):
     
     return st.session_state.shuffled_options_map[q_id]
 
+def arm_exam_deadlines(idx):
+    """
+    Registers this session's deadlines with the shared scheduler: one for the current question
+    (records "Time Out") and one for the whole exam (auto-finishes). Safe to call on every rerun.
+    """
+    clock = st.session_state.exam_clock
+    scheduler = get_deadline_scheduler()
+    ctx = get_script_run_ctx()
+    session_id = ctx.session_id if ctx else None
+
+    exam_limit = st.session_state.exam_time_limit
+    if exam_limit and clock.get("exam_token") is None:
+        def expire_exam():
+            clock["expired"] = True
+            request_session_rerun(session_id)
+        clock["exam_deadline"] = st.session_state.quiz_start_time + exam_limit
+        clock["exam_token"] = scheduler.schedule(clock["exam_deadline"], expire_exam)
+
+    question_limit = st.session_state.question_time_limit
+    if question_limit and clock.get("question_index") != idx and idx not in st.session_state.user_answers:
+        scheduler.cancel(clock.get("question_token"))
+        # Captured by reference: a reset swaps in new dicts, so a stale callback cannot touch the new exam
+        user_answers = st.session_state.user_answers
+        question_times = st.session_state.question_times
+        def time_out_question():
+            if user_answers.setdefault(idx, "Time Out") == "Time Out":
+                question_times.setdefault(idx, question_limit)
+                request_session_rerun(session_id)
+        clock["question_index"] = idx
+        clock["question_token"] = scheduler.schedule(st.session_state.start_time + question_limit, time_out_question)
+
+def disarm_exam_deadlines():
+    """Cancels any pending deadlines of this session and starts a fresh exam clock."""
+    clock = st.session_state.exam_clock
+    if clock:
+        scheduler = get_deadline_scheduler()
+        scheduler.cancel(clock.get("question_token"))
+        scheduler.cancel(clock.get("exam_token"))
+    st.session_state.exam_clock = {}
+
+def submit_exam_answer(idx, q_data, user_selection, seconds_spent):
+    """Records an Exam Mode answer (prefixed string or list of them), updates the score and shows instant feedback."""
+    if idx in st.session_state.user_answers:
+        return # The deadline scheduler already recorded a Time Out
+    st.session_state.user_answers[idx] = user_selection
+    st.session_state.question_times[idx] = int(seconds_spent)
+    get_deadline_scheduler().cancel(st.session_state.exam_clock.get("question_token"))
+
+    # Score calculation (based on saved prefixed string)
+    if is_answer_correct(get_user_answer_chars(user_selection), q_data['correct']):
+        st.session_state.score += 1
+        st.toast("✅ Correct Answer! Great job.", icon='🎉')
+    else:
+        st.toast("❌ Incorrect. Review the options.", icon='🚨')
+
+def sync_parsed_questions():
+    """
+    Moves the questions the background parse produced since the last run into quiz_data. In Exam Mode new
+    questions are shuffled into the part of the exam not reached yet, and that part gets its final shuffle
+    once parsing completes. Returns True while parsing continues.
+    """
+    job = st.session_state.parse_job
+    if job is None:
+        return False
+    done = job.done # Read before slicing, so nothing appended in between is missed
+    quiz_data = st.session_state.quiz_data
+    new_questions = job.questions[len(quiz_data):]
+    if st.session_state.quiz_mode == "Exam Mode":
+        if new_questions or done:
+            upcoming = quiz_data[st.session_state.current_index + 1:] + new_questions
+            random.shuffle(upcoming)
+            quiz_data[st.session_state.current_index + 1:] = upcoming
+    else:
+        quiz_data.extend(new_questions)
+    if done:
+        st.session_state.parse_job = None
+        if job.error:
+            st.toast(f"⚠️ Stopped reading {job.file_name} after {len(quiz_data)} questions: {job.error}", icon='⚠️')
+    return not done
+
+@restores_idle_state
+def stop_background_parse():
+    """Stops a running background parse; the quiz carries on with the questions loaded so far."""
+    job = st.session_state.parse_job
+    if job is not None:
+        job.cancel()
+        sync_parsed_questions()
+
+def go_next_exam():
+    st.session_state.current_index += 1
+    st.session_state.start_time = time.time()
+
+def handle_answer_pad_event(pad_event, idx, q_data, letter_to_prefixed, seconds_elapsed, is_time_up, can_proceed):
+    """
+    Applies one message from the answer pad: {"msg_id", "action": submit|next|finish, "question_id", "selection", "elapsed"}.
+    The component keeps returning its last value on every rerun, so each msg_id is handled only once.
+    """
+    if not pad_event or pad_event.get("msg_id") == st.session_state.answer_pad_last_msg:
+        return
+    st.session_state.answer_pad_last_msg = pad_event.get("msg_id")
+    if pad_event.get("question_id") != q_data["id"]:
+        return # Stale message for a question we already moved away from
+
+    action = pad_event.get("action")
+    if action == "submit" and idx not in st.session_state.user_answers:
+        if is_time_up:
+            st.session_state.user_answers[idx] = "Time Out"
+            st.session_state.question_times[idx] = int(seconds_elapsed)
+        else:
+            selection = [letter_to_prefixed[c] for c in pad_event.get("selection", []) if c in letter_to_prefixed]
+            if not selection:
+                return
+            user_selection = selection if len(q_data['correct']) > 1 else selection[0]
+            # Client-measured time, capped by the server clock so it cannot be inflated
+            seconds_spent = min(float(pad_event.get("elapsed") or seconds_elapsed), seconds_elapsed)
+            submit_exam_answer(idx, q_data, user_selection, seconds_spent)
+        st.rerun()
+    elif action == "next" and can_proceed and idx + 1 < len(st.session_state.quiz_data):
+        go_next_exam()
+        st.rerun()
+    elif action == "finish" and can_proceed and st.session_state.parse_job is None:
+        st.session_state.quiz_finished = True
+        st.rerun()
+
 def toggle_show_answer():
     st.session_state.show_answer_study = not st.session_state.show_answer_study
 
+@restores_idle_state
 def toggle_follow_up():
     """Toggles follow-up status. Does NOT move to the next question."""
     idx = st.session_state.current_index
@@ -309,6 +746,10 @@ def toggle_follow_up():
 
 def go_to_main_screen():
     """Resets states to return to the Setup Screen (clearing quiz_data forces re-upload)."""
+    disarm_exam_deadlines()
+    if st.session_state.parse_job is not None:
+        st.session_state.parse_job.cancel()
+        st.session_state.parse_job = None
     st.session_state.quiz_data = []
     st.session_state.current_index = 0
     st.session_state.score = 0
@@ -321,6 +762,8 @@ def go_to_main_screen():
     st.session_state.follow_up_questions = []
     st.session_state.show_answer_study = False
     st.session_state.shuffled_options_map = {}
+    st.session_state.question_times = {}
+    st.session_state.quiz_bank = None
 
 def go_next_study():
     st.session_state.current_index += 1
@@ -361,6 +804,7 @@ def explore_question(q_data):
     pass
 
 def reset_exam_progress():
+    disarm_exam_deadlines()
     st.session_state.current_index = 0
     st.session_state.score = 0
     st.session_state.user_answers = {}
@@ -369,6 +813,7 @@ def reset_exam_progress():
     st.session_state.quiz_start_time = time.time()
     st.session_state.follow_up_questions = []
     st.session_state.shuffled_options_map = {}
+    st.session_state.question_times = {}
     
 def start_review_mode(question_ids_to_review):
     """Filters quiz_data to only include specified question IDs and switches to Study Mode."""
@@ -382,6 +827,8 @@ def start_review_mode(question_ids_to_review):
     # Filter and re-order questions
     reviewed_questions = [id_to_question_map[q_id] for q_id in question_ids_to_review if q_id in id_to_question_map]
 
+    disarm_exam_deadlines()
+
     # Overwrite session state with the filtered set
     st.session_state.quiz_data = reviewed_questions
     st.session_state.exam_name = f"Review: {st.session_state.exam_name}"
@@ -391,12 +838,160 @@ def start_review_mode(question_ids_to_review):
     st.session_state.user_answers = {}
     st.session_state.show_answer_study = True
     st.session_state.shuffled_options_map = {}
+    st.session_state.question_times = {}
+
+def format_duration(total_seconds):
+    """Formats seconds as HH:MM:SS."""
+    mm, ss = divmod(int(total_seconds), 60)
+    hh, mm = divmod(mm, 60)
+    return f"{hh:02}:{mm:02}:{ss:02}"
+
+def build_topic_breakdown(quiz_data, user_answers, incorrect_q_ids):
+    """Per-topic score rows for the results screen, weakest topic first."""
+    totals = {}
+    for index, q_data in enumerate(quiz_data):
+        row = totals.setdefault(q_data.get("topic", GENERAL_TOPIC), {"Questions": 0, "Answered": 0, "Correct": 0})
+        row["Questions"] += 1
+        if user_answers.get(index) not in (None, "Time Out", 'STUDY_REVIEW_NO_SELECTION'):
+            row["Answered"] += 1
+            if q_data['id'] not in incorrect_q_ids:
+                row["Correct"] += 1
+    rows = [{"Topic": topic, **counts, "Score %": round(counts["Correct"] / counts["Questions"] * 100, 1)} for topic, counts in totals.items()]
+    return sorted(rows, key=lambda row: (row["Score %"], row["Topic"]))
+
+def build_question_images_html(q_data):
+    """Thumbnail links for a question's diagrams. Only URLs are sent; the browser fetches and caches the files."""
+    images = q_data.get("images")
+    if not images:
+        return ""
+    links = [
+        f'<a href="{ASSET_URL_PREFIX}/{img["full"]}" target="_blank"><img src="{ASSET_URL_PREFIX}/{img["thumb"]}" loading="lazy" alt="Question diagram"></a>'
+        for img in images
+    ]
+    return f'<div class="question-images">{"".join(links)}</div>'
+
+def build_review_card(position, index, q_data, incorrect_q_ids, follow_up_ids):
+    """Builds the HTML card for one question in the full exam review (chosen vs correct options and time spent)."""
+    user_choice = st.session_state.user_answers.get(index)
+    picked_chars = get_user_answer_chars(user_choice) if user_choice not in ("Time Out", 'STUDY_REVIEW_NO_SELECTION') else []
+
+    if user_choice == "Time Out":
+        status = "⏰ Time Out"
+    elif user_choice is None:
+        status = "➖ Not Answered"
+    elif q_data['id'] in incorrect_q_ids:
+        status = "❌ Wrong"
+    else:
+        status = "✅ Correct"
+    if q_data['id'] in follow_up_ids:
+        status += " · ❓ Follow Up"
+
+    seconds_spent = st.session_state.question_times.get(index)
+    time_spent = f"⏱️ {format_duration(seconds_spent)}" if seconds_spent is not None else "⏱️ --:--:--"
+
+    option_rows = []
+    for i, raw_text in enumerate(q_data['options'][:len(VALID_OPTIONS)]):
+        char = VALID_OPTIONS[i]
+        is_correct = char in q_data['correct']
+        is_picked = char in picked_chars
+        css_class = "review-option"
+        marker = ""
+        if is_correct:
+            css_class += " review-correct"
+            marker = " ✅ (Correct" + (", Your Answer)" if is_picked else ")")
+        elif is_picked:
+            css_class += " review-wrong"
+            marker = " ❌ (Your Answer)"
+        option_rows.append(f'<div class="{css_class}">{char}: {html.escape(raw_text)}{marker}</div>')
+
+    return (
+        f'<div class="question-card">'
+        f'<p class="review-meta">#{position} · Question ID {q_data["id"]} · {status} · {time_spent}</p>'
+        f'<div class="question-text">{html.escape(q_data["question"])}</div>'
+        f'{build_question_images_html(q_data)}'
+        f'{"".join(option_rows)}'
+        f'</div>'
+    )
+
+@st.fragment(run_every=PARSE_PROGRESS_REFRESH_SECONDS)
+def render_parse_progress():
+    """Progress bar and Stop button while the rest of an upload is parsed. Refreshes itself without a full rerun."""
+    # Fragment reruns skip the top-level touch; a session whose bank is still loading is not idle
+    if not touch_idle_session():
+        st.rerun(scope="app")
+    quiz_data = st.session_state.quiz_data
+    loaded_before = len(quiz_data)
+    at_last_question = st.session_state.current_index + 1 >= loaded_before
+    job = st.session_state.parse_job
+    if not sync_parsed_questions() or (at_last_question and len(quiz_data) > loaded_before):
+        st.rerun(scope="app") # Redraw question counts and the Next / Finish buttons
+    col_progress, col_stop = st.columns([5, 1])
+    col_progress.progress(job.progress, text=f"⏳ Loading {job.file_name}: {len(quiz_data)} questions ready...")
+    col_stop.button("✖ Stop Loading", key="stop_parse_btn", on_click=stop_background_parse)
+
+@st.fragment
+def render_full_review(incorrect_q_ids, follow_up_ids):
+    """
+    Paginated review of every exam question. Runs as a fragment so paging/filtering only reruns this block,
+    and only the visible page is turned into HTML (one markdown element per page).
+    """
+    # Fragment reruns skip the top-level touch, so restore state spilled while idle here
+    if not touch_idle_session():
+        st.rerun(scope="app")
+    st.markdown("### 📖 Full Exam Review")
+
+    c_filter, c_size, c_page = st.columns([3, 1, 1])
+    with c_filter:
+        review_filter = st.radio("Show:", REVIEW_FILTERS, horizontal=True, key="review_filter")
+    with c_size:
+        page_size = st.selectbox("Per page", REVIEW_PAGE_SIZES, key="review_page_size")
+
+    # Filter on indices only; question content is not touched until the page is built
+    quiz_data = st.session_state.quiz_data
+    user_answers = st.session_state.user_answers
+    if review_filter == "❌ Wrong":
+        visible_indices = [i for i, q in enumerate(quiz_data) if q['id'] in incorrect_q_ids]
+    elif review_filter == "❓ Follow Up":
+        visible_indices = [i for i, q in enumerate(quiz_data) if q['id'] in follow_up_ids]
+    elif review_filter == "⏰ Timed Out":
+        visible_indices = [i for i in range(len(quiz_data)) if user_answers.get(i) == "Time Out"]
+    else:
+        visible_indices = list(range(len(quiz_data)))
+
+    if not visible_indices:
+        st.info("No questions match this filter.")
+        return
+
+    total_pages = (len(visible_indices) + page_size - 1) // page_size
+    with c_page:
+        page = st.number_input("Page", min_value=1, max_value=total_pages, value=1, step=1, key=f"review_page_{review_filter}_{page_size}")
+
+    start = (page - 1) * page_size
+    page_indices = visible_indices[start:start + page_size]
+    st.caption(f"Showing {start + 1}–{start + len(page_indices)} of {len(visible_indices)} questions (page {page} of {total_pages}).")
 
+    cards = [build_review_card(start + n + 1, i, quiz_data[i], incorrect_q_ids, follow_up_ids) for n, i in enumerate(page_indices)]
+    st.markdown("".join(cards), unsafe_allow_html=True)
+
+# Restore this session's heavy state if it was spilled while idle (after the helpers: a lost snapshot resets the quiz)
+touch_idle_session()
+if st.session_state.pop("spill_restore_failed", False):
+    st.warning("⚠️ This session was idle for a long time and its progress could not be restored. Please start again.")
 
 # ==========================================
 # SCREEN 3: RESULTS (Exam Mode Only) - Highest Priority Check
 # ==========================================
+# The shared scheduler flags the clock when the whole-exam budget runs out; the deadline is also checked here
+# for runs triggered by the browser timer instead
+exam_clock = st.session_state.exam_clock
+exam_time_over = exam_clock.get("expired") or time.time() >= exam_clock.get("exam_deadline", float("inf"))
+if exam_time_over and st.session_state.quiz_data and not st.session_state.quiz_finished:
+    st.session_state.quiz_finished = True
+    st.toast("⏰ Exam time is up! Your exam has been submitted.", icon='⏰')
+
 if st.session_state.quiz_finished and st.session_state.quiz_data:
+    disarm_exam_deadlines()
+    stop_background_parse() # Ended before the whole upload was parsed
     st.balloons()
     final = st.session_state.score
     total = len(st.session_state.quiz_data)
@@ -443,15 +1038,9 @@ if st.session_state.quiz_finished and st.session_state.quiz_data:
             correct_answers_list = q_data['correct']
             
             # Extract the option character(s) from the user's saved choice(s)
-            if isinstance(user_choice, list): # Multiple choice
-                # Get the first character of the prefixed string (A: Option)
-                user_chars = sorted([x.strip()[0].upper() for x in user_choice])
-            elif user_choice and isinstance(user_choice, str): # Single choice
-                user_chars = [user_choice.strip()[0].upper()]
-            else:
-                user_chars = []
+            user_chars = get_user_answer_chars(user_choice)
                 
-            if user_chars == correct_answers_list:
+            if is_answer_correct(user_chars, correct_answers_list):
                 is_correct = True
             
             if not is_correct:
@@ -459,6 +1048,15 @@ if st.session_state.quiz_finished and st.session_state.quiz_data:
 
     # 2. Extract Manually Followed-up Questions IDs
     manual_follow_up_ids = set(st.session_state.follow_up_questions)
+
+    # Score breakdown by topic (topics are tagged when the bank is parsed)
+    st.markdown("### 🧭 Score by Topic")
+    st.dataframe(
+        build_topic_breakdown(st.session_state.quiz_data, st.session_state.user_answers, incorrect_q_ids),
+        width="stretch",
+        hide_index=True,
+        column_config={"Score %": st.column_config.ProgressColumn("Score %", min_value=0, max_value=100, format="%.1f%%")}
+    )
     
     st.markdown("### 📝 Detailed Review")
     
@@ -506,6 +1104,9 @@ if st.session_state.quiz_finished and st.session_state.quiz_data:
         if st.button("🏠 Go to Main Screen", type="secondary", on_click=go_to_main_screen):
             st.rerun()
 
+    st.write("---")
+    render_full_review(incorrect_q_ids, manual_follow_up_ids)
+
 # ==========================================
 # SCREEN 1 & 2: SETUP OR INTERFACE
 # ==========================================
@@ -513,6 +1114,8 @@ elif st.session_state.quiz_data:
     
     # --- IF QUIZ DATA EXISTS, GO TO INTERFACE (SCREEN 2) ---
     
+    # Questions of an upload that is still being parsed join the quiz as they arrive
+    is_parsing = sync_parsed_questions()
     idx = st.session_state.current_index
     total_q = len(st.session_state.quiz_data)
     q_data = st.session_state.quiz_data[idx]
@@ -560,34 +1163,14 @@ elif st.session_state.quiz_data:
         st.markdown(f"### 📝 {st.session_state.exam_name} ({st.session_state.quiz_mode})")
         
     with col_controls:
-        # Calculate Total Elapsed Time
+        # Calculate Total Elapsed Time (counts down instead when the exam has a total time budget)
         total_elapsed = int(time.time() - st.session_state.quiz_start_time)
+        exam_limit = st.session_state.exam_time_limit if is_exam_mode else 0
         
-        timer_id = "total_timer_display" if is_exam_mode else "study_timer_display"
-        
-        # Adjusted Timer background/text colors for light theme
-        timer_html = f"""
-        <div style="text-align: right; margin-bottom: 10px;">
-            <div id="{timer_id}" style="font-size: 18px; font-weight: bold; color: #4b5563; background: #e5e7eb; padding: 5px 15px; border-radius: 20px; display: inline-block;">
-                ⏱️ 00:00:00
-            </div>
-        </div>
-        <script>
-            var startTimestamp = Date.now() - ({total_elapsed} * 1000);
-            setInterval(function() {{
-                var now = Date.now();
-                var diff = Math.floor((now - startTimestamp) / 1000);
-                var h = Math.floor(diff / 3600);
-                var m = Math.floor((diff % 3600) / 60);
-                var s = diff % 60;
-                if (h < 10) h = "0" + h;
-                if (m < 10) m = "0" + m;
-                if (s < 10) s = "0" + s;
-                document.getElementById("{timer_id}").innerHTML = "⏱️ " + h + ":" + m + ":" + s;
-            }}, 1000);
-        </script>
-        """
-        components.html(timer_html, height=45)
+        exam_timer(kind="clock", seconds=total_elapsed, limit=exam_limit, key="header_timer", default=None)
+
+    if is_parsing:
+        render_parse_progress()
     
     # -------------------------------------------------------------------------
     # A. EXAM MODE LOGIC
@@ -617,52 +1200,27 @@ elif st.session_state.quiz_data:
         previous_choice_prefixed = st.session_state.user_answers.get(idx, None)
         is_answered = previous_choice_prefixed is not None and previous_choice_prefixed != 'STUDY_REVIEW_NO_SELECTION'
         
-        # Timer (180s limit for the question)
-        time_limit = 180
+        # Timer (configurable limit for the question; deadlines are enforced by the shared scheduler)
+        if not is_answered:
+            arm_exam_deadlines(idx)
+        time_limit = st.session_state.question_time_limit
         elapsed = time.time() - st.session_state.start_time
-        remaining_seconds = max(0, int(time_limit - elapsed))
-        
-        # Format HH:MM:SS
-        mm, ss = divmod(remaining_seconds, 60)
-        hh, mm = divmod(mm, 60)
-        initial_str = f"{hh:02}:{mm:02}:{ss:02}"
+        remaining_seconds = max(0, int(time_limit - elapsed)) if time_limit else 0
+        is_time_up = bool(time_limit) and remaining_seconds <= 0
+        if is_time_up and not is_answered:
+            # Same record the scheduler writes, for runs triggered by the browser timer reaching zero
+            previous_choice_prefixed = st.session_state.user_answers.setdefault(idx, "Time Out")
+            st.session_state.question_times.setdefault(idx, time_limit)
+            is_answered = True
         
         col_q_timer, col_q_space = st.columns([1, 6])
-        if not is_answered:
-            timer_html = f"""
-                <style>@keyframes blinker {{ 50% {{ opacity: 0; }} }} .blink_me {{ animation: blinker 0.5s linear infinite; color: red !important; }}</style>
-                <div id="countdown" style="font-weight: bold; font-size: 18px; color: #10b981;">⏳ {initial_str}</div>
-                <script>
-                    var timeleft = {remaining_seconds};
-                    var element = document.getElementById("countdown");
-                    var downloadTimer = setInterval(function(){{
-                    if(timeleft <= 0){{ clearInterval(downloadTimer); element.innerHTML = "🔴 Time Up!"; element.style.color = "red"; }}
-                    else {{
-                        var h = Math.floor(timeleft / 3600);
-                        var m = Math.floor((timeleft % 3600) / 60);
-                        var s = timeleft % 60;
-                        if (h < 10) h = "0" + h;
-                        if (m < 10) m = "0" + m;
-                        if (s < 10) s = "0" + s;
-                        
-                        element.innerHTML = "⏳ " + h + ":" + m + ":" + s + " Left";
-                        
-                        if (timeleft > 60) element.style.color = "#10b981";
-                        else if (timeleft > 30) element.style.color = "#f59e0b";
-                        else {{ element.style.color = "#ef4444"; }}
-                        
-                        if (timeleft <= 20) element.classList.add("blink_me");
-                    }}
-                    timeleft -= 1;
-                    }}, 1000);
-                </script>
-            """
-            with col_q_timer: components.html(timer_html, height=50)
-        else:
+        if not is_answered and time_limit:
+            with col_q_timer: exam_timer(kind="countdown", seconds=remaining_seconds, key="question_timer", default=None)
+        elif is_answered:
             col_q_timer.markdown("⏹ **Stopped**")
 
         # Question Card (No Question X of Y in Exam Mode)
-        st.markdown(f'<div class="question-card"><div class="question-text">{q_data["question"]}</div></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="question-card"><div class="question-text">{q_data["question"]}</div>{build_question_images_html(q_data)}</div>', unsafe_allow_html=True)
 
         # Options
         correct_answers_list = q_data['correct']
@@ -672,109 +1230,112 @@ elif st.session_state.quiz_data:
         # Get the displayed option text corresponding to the saved prefixed answer (for radio pre-selection)
         previous_choice_display = get_raw_option_text(previous_choice_prefixed) if previous_choice_prefixed and isinstance(previous_choice_prefixed, str) else None
 
-        if is_multiple_choice:
-            st.caption("ℹ️ **Select all that apply**")
-            checkbox_answers_prefixed = []
-            if is_answered:
-                # Review Mode for Checkbox
-                user_picked_opts_prefixed = previous_choice_prefixed if isinstance(previous_choice_prefixed, list) else []
-                for opt_display in current_options_for_display:
-                    opt_map = prefixed_options_map[opt_display]
+        can_proceed = is_answered or is_time_up or (q_data["id"] in st.session_state.follow_up_questions)
+
+        if st.session_state.use_answer_pad:
+            # Keyboard answer pad: the selection stays in the browser and only Submit / Next send a message
+            letter_to_prefixed = {opt['prefixed_string'][0]: opt['prefixed_string'] for opt in prefixed_options_map.values()}
+            pad_event = answer_pad(
+                question_id=q_data["id"],
+                options=[{"letter": opt['prefixed_string'][0], "text": display} for display, opt in prefixed_options_map.items()],
+                multi=is_multiple_choice,
+                answered=is_answered,
+                timed_out=previous_choice_prefixed == "Time Out",
+                picked=get_user_answer_chars(previous_choice_prefixed) if is_answered and previous_choice_prefixed != "Time Out" else [],
+                correct=correct_answers_list if is_answered else [], # Never sent before the answer is locked in
+                can_proceed=can_proceed,
+                is_last=idx + 1 >= total_q and not is_parsing,
+                key="answer_pad",
+                default=None
+            )
+            handle_answer_pad_event(pad_event, idx, q_data, letter_to_prefixed, elapsed, is_time_up, can_proceed)
+        else:
+            if is_multiple_choice:
+                st.caption("ℹ️ **Select all that apply**")
+                checkbox_answers_prefixed = []
+                if is_answered:
+                    # Review Mode for Checkbox
+                    user_picked_opts_prefixed = previous_choice_prefixed if isinstance(previous_choice_prefixed, list) else []
+                    for opt_display in current_options_for_display:
+                        opt_map = prefixed_options_map[opt_display]
                     
-                    is_correct_opt = opt_map['is_correct']
-                    is_picked = opt_map['prefixed_string'] in user_picked_opts_prefixed
+                        is_correct_opt = opt_map['is_correct']
+                        is_picked = opt_map['prefixed_string'] in user_picked_opts_prefixed
                     
-                    label = opt_display
-                    if is_correct_opt: label = f":green[**✅ {opt_display} (Correct)**]"
-                    elif is_picked and not is_correct_opt: label = f":red[**❌ {opt_display} (Wrong)**]"
-                    st.checkbox(label, value=is_picked, disabled=True, key=f"chk_{q_data['id']}_{opt_map['original_char']}")
+                        label = opt_display
+                        if is_correct_opt: label = f":green[**✅ {opt_display} (Correct)**]"
+                        elif is_picked and not is_correct_opt: label = f":red[**❌ {opt_display} (Wrong)**]"
+                        st.checkbox(label, value=is_picked, disabled=True, key=f"chk_{q_data['id']}_{opt_map['original_char']}")
+                else:
+                    # Active Checkbox
+                    for i, opt_display in enumerate(current_options_for_display):
+                        # In active mode, we store the full prefixed string for correct scoring
+                        opt_prefixed = prefixed_options_map[opt_display]['prefixed_string']
+                        if st.checkbox(opt_display, key=f"active_chk_{q_data['id']}_{i}"): checkbox_answers_prefixed.append(opt_prefixed)
+                    user_selection_to_save = checkbox_answers_prefixed
             else:
-                # Active Checkbox
-                for i, opt_display in enumerate(current_options_for_display):
-                    # In active mode, we store the full prefixed string for correct scoring
-                    opt_prefixed = prefixed_options_map[opt_display]['prefixed_string']
-                    if st.checkbox(opt_display, key=f"active_chk_{q_data['id']}_{i}"): checkbox_answers_prefixed.append(opt_prefixed)
-                user_selection_to_save = checkbox_answers_prefixed
-        else:
-            display_options = []
-            selected_option_index = None
-            if is_answered:
-                # Review Mode for Radio
-                for i, opt_display in enumerate(current_options_for_display):
-                    opt_map = prefixed_options_map[opt_display]
+                display_options = []
+                selected_option_index = None
+                if is_answered:
+                    # Review Mode for Radio
+                    for i, opt_display in enumerate(current_options_for_display):
+                        opt_map = prefixed_options_map[opt_display]
                     
-                    if opt_map['is_correct']: 
-                        display_options.append(f":green[**✅ {opt_display} (Correct)**]")
-                    elif opt_display == previous_choice_display and not opt_map['is_correct']: 
-                        display_options.append(f":red[**❌ {opt_display} (Your Answer)**]")
-                    else: 
-                        display_options.append(opt_display)
+                        if opt_map['is_correct']: 
+                            display_options.append(f":green[**✅ {opt_display} (Correct)**]")
+                        elif opt_display == previous_choice_display and not opt_map['is_correct']: 
+                            display_options.append(f":red[**❌ {opt_display} (Your Answer)**]")
+                        else: 
+                            display_options.append(opt_display)
                     
-                    if opt_display == previous_choice_display: selected_option_index = i
+                        if opt_display == previous_choice_display: selected_option_index = i
                 
-            else:
-                # Active Radio
-                display_options = current_options_for_display
-                selected_option_index = None
+                else:
+                    # Active Radio
+                    display_options = current_options_for_display
+                    selected_option_index = None
 
-            # Radio buttons: We capture the selected raw text, then map it to the prefixed version for saving
-            user_selection_display = st.radio("Options:", display_options, index=selected_option_index, key=f"radio_{q_data['id']}", disabled=is_answered, label_visibility="collapsed")
+                # Radio buttons: We capture the selected raw text, then map it to the prefixed version for saving
+                user_selection_display = st.radio("Options:", display_options, index=selected_option_index, key=f"radio_{q_data['id']}", disabled=is_answered, label_visibility="collapsed")
             
-            if not is_answered and user_selection_display is not None:
-                # Map the user's displayed selection (raw text) back to the prefixed version for saving
-                user_selection_prefixed = prefixed_options_map[user_selection_display]['prefixed_string']
-                user_selection_to_save = user_selection_prefixed
-            elif is_answered:
-                # In review mode, use the previously saved full string
-                user_selection_to_save = previous_choice_prefixed
+                if not is_answered and user_selection_display is not None:
+                    # Map the user's displayed selection (raw text) back to the prefixed version for saving
+                    user_selection_prefixed = prefixed_options_map[user_selection_display]['prefixed_string']
+                    user_selection_to_save = user_selection_prefixed
+                elif is_answered:
+                    # In review mode, use the previously saved full string
+                    user_selection_to_save = previous_choice_prefixed
 
 
-        st.write("")
-        c_sub, c_next, c_f = st.columns([1, 1, 4])
+            st.write("")
+            c_sub, c_next, c_f = st.columns([1, 1, 4])
         
-        # SUBMIT button logic
-        with c_sub:
-            if st.button("Submit", type="primary", disabled=is_answered):
+            # SUBMIT button logic
+            with c_sub:
+                if st.button("Submit", type="primary", disabled=is_answered, key="submit_btn"):
                 
-                # Check for Time Out submission
-                if remaining_seconds <= 0:
-                    st.session_state.user_answers[idx] = "Time Out"
-                    st.rerun()
-                    
-                has_input = (len(user_selection_to_save) > 0) if is_multiple_choice and isinstance(user_selection_to_save, list) else (user_selection_to_save is not None)
-                if has_input:
-                    
-                    st.session_state.user_answers[idx] = user_selection_to_save
+                    # Check for Time Out submission
+                    if is_time_up or idx in st.session_state.user_answers:
+                        st.session_state.user_answers.setdefault(idx, "Time Out")
+                        st.session_state.question_times.setdefault(idx, int(elapsed))
+                        st.rerun()
                     
-                    # Score calculation (based on saved prefixed string)
-                    is_correct_submission = False
-                    if is_multiple_choice:
-                        user_chars = sorted([x.strip()[0].upper() for x in user_selection_to_save])
-                        if user_chars == correct_answers_list:
-                            is_correct_submission = True
-                    else:
-                        if user_selection_to_save and user_selection_to_save.strip()[0].upper() == correct_answers_list[0]:
-                            is_correct_submission = True
-                        
-                    # Instant Feedback
-                    if is_correct_submission:
-                            st.session_state.score += 1
-                            st.toast("✅ Correct Answer! Great job.", icon='🎉')
-                    else:
-                            st.toast("❌ Incorrect. Review the options.", icon='🚨')
-                            
-                    st.rerun()
-                else: st.warning("Select option(s)")
+                    has_input = (len(user_selection_to_save) > 0) if is_multiple_choice and isinstance(user_selection_to_save, list) else (user_selection_to_save is not None)
+                    if has_input:
+                        submit_exam_answer(idx, q_data, user_selection_to_save, elapsed)
+                        st.rerun()
+                    else: st.warning("Select option(s)")
 
-        # NEXT button logic
-        with c_next:
-            can_proceed = is_answered or (remaining_seconds <= 0) or (q_data["id"] in st.session_state.follow_up_questions)
-            if idx + 1 < total_q:
-                if st.button("Next Question ➡", disabled=not can_proceed):
-                    st.session_state.current_index += 1; st.session_state.start_time = time.time(); st.rerun()
-            else:
-                if st.button("Finish Quiz", type="primary", disabled=not can_proceed):
-                    st.session_state.quiz_finished = True; st.rerun()
+            # NEXT button logic
+            with c_next:
+                if idx + 1 < total_q:
+                    if st.button("Next Question ➡", disabled=not can_proceed, key="next_btn"):
+                        go_next_exam(); st.rerun()
+                elif is_parsing:
+                    st.caption("⏳ More questions loading...")
+                else:
+                    if st.button("Finish Quiz", type="primary", disabled=not can_proceed, key="finish_btn"):
+                        st.session_state.quiz_finished = True; st.rerun()
         
         # FOLLOW UP button (placed below submit/next)
         st.write("")
@@ -791,7 +1352,7 @@ elif st.session_state.quiz_data:
         
         # Question Card with Progress (Study mode keeps Question X of Y)
         q_id_display = idx + 1
-        st.markdown(f'<div class="question-card"><p style="font-size: 14px; color: #4b5563; font-weight: 600; margin-bottom: 5px;">Question {q_id_display} of {total_q}</p><div class="question-text">{q_data["question"]}</div></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="question-card"><p style="font-size: 14px; color: #4b5563; font-weight: 600; margin-bottom: 5px;">Question {q_id_display} of {total_q}</p><div class="question-text">{q_data["question"]}</div>{build_question_images_html(q_data)}</div>', unsafe_allow_html=True)
         
         correct_answers_list = q_data['correct']
         is_multi = len(correct_answers_list) > 1
@@ -849,7 +1410,7 @@ elif st.session_state.quiz_data:
         
         with c_prev:
             if idx > 0:
-                if st.button("⬅ Previous", on_click=go_prev_study): st.rerun()
+                if st.button("⬅ Previous", on_click=go_prev_study, key="prev_study_btn"): st.rerun()
         
         with c_ans:
             if is_review_mode:
@@ -859,7 +1420,9 @@ elif st.session_state.quiz_data:
 
         with c_next:
             if idx + 1 < total_q:
-                if st.button("Next ➡", type="primary", on_click=go_next_study): st.rerun()
+                if st.button("Next ➡", type="primary", on_click=go_next_study, key="next_study_btn"): st.rerun()
+            elif is_parsing:
+                st.caption("⏳ More questions loading...")
             else:
                 st.success("End of Questions")
 
@@ -882,13 +1445,27 @@ else:
 
     col_upload, col_mode = st.columns([2, 1])
 
+    bank_library = get_bank_library()
+
     with col_upload:
-        st.subheader("1. Upload Questions File")
-        uploaded_file = st.file_uploader(
-            "Upload a **.docx** or **.txt** file containing your questions. "
-            "Questions should be separated by an 'Answer:' line.",
-            type=["docx", "txt"]
+        st.subheader("1. Choose Questions")
+        # No widget key: labels change once a bank finishes warming, so the choice is carried over manually
+        bank_options = bank_library.names() + [UPLOAD_OWN_FILE]
+        previous_bank_choice = st.session_state.get('bank_choice')
+        bank_choice = st.selectbox(
+            "Pick a question bank from the library, or upload your own file.",
+            options=bank_options,
+            index=bank_options.index(previous_bank_choice) if previous_bank_choice in bank_options else 0,
+            format_func=bank_library.describe
         )
+        st.session_state.bank_choice = bank_choice
+        uploaded_file = None
+        if bank_choice == UPLOAD_OWN_FILE:
+            uploaded_file = st.file_uploader(
+                "Upload a **.docx** or **.txt** file containing your questions. "
+                "Questions should be separated by an 'Answer:' line.",
+                type=["docx", "txt"]
+            )
         exam_name = st.text_input("Enter Exam/Quiz Name (Optional)", key="exam_name_input")
 
     with col_mode:
@@ -900,45 +1477,79 @@ else:
             key="quiz_mode_radio"
         )
         st.info(f"**{quiz_mode}** selected.")
+        if quiz_mode == "Exam Mode":
+            question_time_limit = st.number_input("⏳ Time per question (seconds, 0 = no limit)", min_value=0, value=DEFAULT_QUESTION_TIME_LIMIT, step=30, key="question_time_limit_input")
+            exam_time_limit_min = st.number_input("⏱️ Total exam time (minutes, 0 = no limit)", min_value=0, value=DEFAULT_EXAM_TIME_LIMIT, step=5, key="exam_time_limit_input")
+            use_answer_pad = st.checkbox("⌨️ Keyboard answer pad (A–F select, Enter submit, N next)", value=False, key="use_answer_pad_input", help="Keeps your selection in the browser, so each question needs one server round-trip instead of several.")
         
     st.write("---")
 
-    if st.button("🚀 Start Quiz", type="primary", disabled=uploaded_file is None):
-        if uploaded_file is not None:
-            # 1. Parsing the file
+    is_upload = bank_choice == UPLOAD_OWN_FILE
+    if st.button("🚀 Start Quiz", type="primary", disabled=is_upload and uploaded_file is None, key="start_quiz_btn"):
+        questions = None
+        parse_job = None
+        if is_upload and uploaded_file is not None:
+            # 1. Parsing the file in the background; the quiz starts as soon as the first questions are ready
+            parse_job = ParseJob(uploaded_file.getvalue(), uploaded_file.name)
+            if not parse_job.supported:
+                st.error("Unsupported file type.")
+                st.stop()
             with st.spinner("Processing questions..."):
-                file_extension = uploaded_file.name.split('.')[-1].lower()
-                if file_extension == 'docx':
-                    questions = parse_docx(uploaded_file)
-                elif file_extension == 'txt':
-                    questions = parse_txt(uploaded_file)
+                parse_job.wait_for_first_question()
+            if parse_job.error and not parse_job.questions:
+                st.error(f"Could not read {uploaded_file.name}: {parse_job.error}")
+                st.stop()
+            questions = list(parse_job.questions) # The rest joins via sync_parsed_questions()
+            source_name = uploaded_file.name
+        elif not is_upload:
+            # 1. Library bank: already parsed in the background, so this is just a lookup
+            shared_questions = bank_library.get_questions(bank_choice)
+            if shared_questions is None:
+                load_error = bank_library.get_error(bank_choice)
+                if load_error:
+                    st.error(f"Could not load {bank_choice}: {load_error}")
                 else:
-                    st.error("Unsupported file type.")
-                    st.stop()
+                    st.info("⏳ This bank is still being prepared on the server. Press **Start Quiz** again in a moment.")
+                st.stop()
+            questions = list(shared_questions) # Own copy of the order; question dicts stay shared and read-only
+            source_name = bank_choice
+
+        # 2. Saving to session state
+        if questions:
             
-            # 2. Saving to session state
-            if questions:
-                
-                # SHUFFLE ONLY FOR EXAM MODE (Question order shuffle)
-                if quiz_mode == "Exam Mode":
-                    random.shuffle(questions)
-                    st.info("Questions have been shuffled for a realistic Exam Mode experience.")
-                else: # Study Mode: Sequential order
-                    st.info("Questions are in the original sequential order for Study Mode.")
-                
-                st.session_state.quiz_data = questions
-                st.session_state.exam_name = exam_name if exam_name else uploaded_file.name.rsplit('.', 1)[0]
-                st.session_state.quiz_mode = quiz_mode
-                st.session_state.quiz_start_time = time.time() # Start the main timer
-                st.session_state.start_time = time.time() # Start the first question timer
-                st.session_state.current_index = 0 # Ensure we start at the first question
-                st.session_state.user_answers = {} # Clear any prior answers
-                st.session_state.shuffled_options_map = {} # Clear shuffle map for a fresh start
-                st.success(f"Successfully loaded **{len(questions)}** questions!")
-                st.rerun()
-            else:
-                st.warning("Could not find any questions in the file. Please check the format.")
+            # SHUFFLE ONLY FOR EXAM MODE (Question order shuffle)
+            if quiz_mode == "Exam Mode":
+                random.shuffle(questions)
+                st.info("Questions have been shuffled for a realistic Exam Mode experience.")
+            else: # Study Mode: Sequential order
+                st.info("Questions are in the original sequential order for Study Mode.")
+            
+            st.session_state.quiz_data = questions
+            st.session_state.quiz_bank = None if is_upload else bank_choice
+            st.session_state.parse_job = parse_job
+            st.session_state.exam_name = exam_name if exam_name else source_name.rsplit('.', 1)[0]
+            st.session_state.quiz_mode = quiz_mode
+            st.session_state.quiz_start_time = time.time() # Start the main timer
+            st.session_state.start_time = time.time() # Start the first question timer
+            st.session_state.current_index = 0 # Ensure we start at the first question
+            st.session_state.user_answers = {} # Clear any prior answers
+            st.session_state.shuffled_options_map = {} # Clear shuffle map for a fresh start
+            st.session_state.question_times = {} # Clear per-question timings
+            if quiz_mode == "Exam Mode":
+                st.session_state.question_time_limit = int(question_time_limit)
+                st.session_state.exam_time_limit = int(exam_time_limit_min) * 60
+                st.session_state.use_answer_pad = use_answer_pad
+            disarm_exam_deadlines() # Fresh exam clock; deadlines are armed on the first question render
+            st.success(f"Successfully loaded **{len(questions)}** questions!")
+            st.rerun()
+        elif questions is not None:
+            st.warning("Could not find any questions in the file. Please check the format.")
                 
+    if IDLE_SPILL_SECONDS and SHOW_WORKER_MEMORY:
+        with st.expander("🧮 Worker Memory (open sessions)"):
+            st.caption(f"Session state is spilled to disk after {IDLE_SPILL_SECONDS // 60} idle minutes and restored on the next click.")
+            st.dataframe(get_idle_session_manager().memory_report(), width="stretch", hide_index=True)
+
     st.markdown("""
         <div class="subtle-all-the-best">All The Best!</div>
         """, unsafe_allow_html=True)
\ No newline at end of file